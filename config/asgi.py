@@ -3,6 +3,9 @@ ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Async code served by this application can send a mailing without blocking
+the event loop by awaiting ``send_mailing(mailing_id)`` defined below.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -14,3 +17,23 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
 application = get_asgi_application()
+
+# Импорт после get_asgi_application(): модели доступны только после настройки приложений.
+from mailings.models import Mailing  # noqa: E402
+from mailings.services import asend_mailing_now  # noqa: E402
+
+
+async def send_mailing(mailing_id: int, concurrency: int = None, resume: bool = False) -> dict:
+    """Асинхронная точка входа: отправляет рассылку на цикле событий ASGI-сервера.
+
+    Аргументы:
+        mailing_id (int): id рассылки.
+        concurrency (int | None): сколько писем в работе одновременно,
+            по умолчанию `MAILING_ASYNC_CONCURRENCY`.
+        resume (bool): докачать прерванный запуск.
+
+    Возвращает:
+        dict: статистика запуска, как у `asend_mailing_now`.
+    """
+    mailing = await Mailing.objects.aget(pk=mailing_id)
+    return await asend_mailing_now(mailing, concurrency=concurrency, resume=resume)
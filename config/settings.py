@@ -155,6 +155,97 @@ EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 PASSWORD_RESET_TIMEOUT = 60 * 60 * 24
 
+# Пул SMTP-соединений для рассылок: число соединений, писем на соединение
+# подряд и максимальное время жизни соединения в секундах.
+MAILING_SMTP_POOL_SIZE = int(os.getenv('MAILING_SMTP_POOL_SIZE', 2))
+MAILING_SMTP_BATCH_SIZE = int(os.getenv('MAILING_SMTP_BATCH_SIZE', 100))
+MAILING_SMTP_CONNECTION_LIFETIME = int(os.getenv('MAILING_SMTP_CONNECTION_LIFETIME', 300))
+
+# Число одновременных SMTP-сессий асинхронного движка (send_mailing --asyncio).
+MAILING_ASYNC_CONCURRENCY = int(os.getenv('MAILING_ASYNC_CONCURRENCY', 500))
+
+# Сколько строк получателей читать из серверного курсора за раз.
+MAILING_RECIPIENT_CHUNK_SIZE = int(os.getenv('MAILING_RECIPIENT_CHUNK_SIZE', 2000))
+
+# Пауза воркера run_send_worker между проверками пустой очереди, в секундах.
+MAILING_WORKER_POLL_INTERVAL = float(os.getenv('MAILING_WORKER_POLL_INTERVAL', 2))
+
+# Планировщик run_scheduler: сколько рассылок запускать за одну транзакцию
+# и максимальная пауза между проходами, в секундах.
+MAILING_SCHEDULER_BATCH_SIZE = int(os.getenv('MAILING_SCHEDULER_BATCH_SIZE', 500))
+MAILING_SCHEDULER_MAX_SLEEP = float(os.getenv('MAILING_SCHEDULER_MAX_SLEEP', 60))
+
+# Лимиты отправки по доменам получателей: домен → (писем в секунду, запас).
+# Для остальных доменов — MAILING_DEFAULT_DOMAIN_RATE (None — без ограничения).
+# Вперёд читается MAILING_THROTTLE_WINDOW получателей; если все домены в окне ждут,
+# чтение продолжается до MAILING_THROTTLE_MAX_BUFFER получателей.
+MAILING_DOMAIN_RATES = {
+    'gmail.com': (20, 40),
+    'yandex.ru': (10, 20),
+    'mail.ru': (10, 20),
+}
+MAILING_DEFAULT_DOMAIN_RATE = None
+MAILING_THROTTLE_WINDOW = int(os.getenv('MAILING_THROTTLE_WINDOW', 10000))
+MAILING_THROTTLE_MAX_BUFFER = int(os.getenv('MAILING_THROTTLE_MAX_BUFFER', 100000))
+
+# Повторная отправка после временных ошибок (4xx, обрыв, таймаут):
+# число повторов, пауза перед первым и максимальная пауза (секунды),
+# размер пачки воркера и срок, на который воркер забирает повтор.
+MAILING_RETRY_MAX_ATTEMPTS = int(os.getenv('MAILING_RETRY_MAX_ATTEMPTS', 5))
+MAILING_RETRY_BASE_DELAY = float(os.getenv('MAILING_RETRY_BASE_DELAY', 60))
+MAILING_RETRY_MAX_DELAY = float(os.getenv('MAILING_RETRY_MAX_DELAY', 3600))
+MAILING_RETRY_BATCH_SIZE = int(os.getenv('MAILING_RETRY_BATCH_SIZE', 500))
+MAILING_RETRY_CLAIM_TIMEOUT = int(os.getenv('MAILING_RETRY_CLAIM_TIMEOUT', 600))
+
+# Почтовый бэкенд для писем рассылок (по умолчанию — EMAIL_BACKEND).
+# Для нагрузочных тестов и пробных запусков без SMTP:
+# mailings.backends.MboxBackend или mailings.backends.MaildirBackend.
+MAILING_EMAIL_BACKEND = os.getenv('MAILING_EMAIL_BACKEND') or None
+# Файловые бэкенды: каталог, размер файла до ротации и буфер записи в байтах.
+MAILING_FILE_PATH = os.getenv('MAILING_FILE_PATH') or str(BASE_DIR / 'sent_mail')
+MAILING_FILE_ROTATE_BYTES = int(os.getenv('MAILING_FILE_ROTATE_BYTES', 256 * 1024 * 1024))
+MAILING_FILE_BUFFER_SIZE = int(os.getenv('MAILING_FILE_BUFFER_SIZE', 1024 * 1024))
+
+# Прогресс отправки в кэше (Redis): срок хранения счётчиков в секундах
+# и период опроса со страницы рассылки в секундах.
+MAILING_PROGRESS_TTL = int(os.getenv('MAILING_PROGRESS_TTL', 86400))
+MAILING_PROGRESS_POLL_INTERVAL = float(os.getenv('MAILING_PROGRESS_POLL_INTERVAL', 2))
+
+# Аренда рассылки отправителем: срок в секундах и интервал продления.
+# Если отправитель не продлил аренду за MAILING_LEASE_TTL секунд (упал процесс
+# или хост), рассылку может забрать другой отправитель и докачать её.
+MAILING_LEASE_TTL = int(os.getenv('MAILING_LEASE_TTL', 60))
+MAILING_LEASE_HEARTBEAT = float(os.getenv('MAILING_LEASE_HEARTBEAT', 15))
+
+# Сводки попыток (rollup_attempts): пауза между проходами в секундах, отставание
+# от текущего времени в секундах (больше MAILING_ATTEMPT_FLUSH_INTERVAL) и размер окна в часах.
+MAILING_ROLLUP_INTERVAL = float(os.getenv('MAILING_ROLLUP_INTERVAL', 60))
+MAILING_ROLLUP_LAG = float(os.getenv('MAILING_ROLLUP_LAG', 120))
+MAILING_ROLLUP_WINDOW = int(os.getenv('MAILING_ROLLUP_WINDOW', 24))
+
+# Помесячные секции таблицы попыток (PostgreSQL, manage_attempt_partitions):
+# на сколько месяцев вперёд создавать секции и сколько месяцев хранить попытки (0 — всё).
+MAILING_ATTEMPT_PARTITIONS_AHEAD = int(os.getenv('MAILING_ATTEMPT_PARTITIONS_AHEAD', 3))
+MAILING_ATTEMPT_RETENTION_MONTHS = int(os.getenv('MAILING_ATTEMPT_RETENTION_MONTHS', 0))
+
+# Архив попыток (archive_attempts): каталог суточных файлов .jsonl.gz, размер порции
+# серверного курсора и размер диапазона id при удалении выгруженных строк.
+# Каталог не должен раздаваться веб-сервером: в архиве ответы почтовых серверов,
+# поэтому по умолчанию он вне MEDIA_ROOT.
+MAILING_ARCHIVE_DIR = os.getenv('MAILING_ARCHIVE_DIR') or str(BASE_DIR / 'archive' / 'attempts')
+MAILING_ARCHIVE_CHUNK_SIZE = int(os.getenv('MAILING_ARCHIVE_CHUNK_SIZE', 5000))
+MAILING_ARCHIVE_DELETE_BATCH = int(os.getenv('MAILING_ARCHIVE_DELETE_BATCH', 10000))
+
+# Приблизительные подсчёты (главная страница, заголовки списков): если оценка планировщика
+# PostgreSQL меньше порога, считаем точно, иначе показываем оценку. Интервал в секундах
+# между пересчётами сохранённых показателей командой refresh_counts.
+MAILING_EXACT_COUNT_THRESHOLD = int(os.getenv('MAILING_EXACT_COUNT_THRESHOLD', 10000))
+MAILING_COUNT_REFRESH_INTERVAL = float(os.getenv('MAILING_COUNT_REFRESH_INTERVAL', 3600))
+
+# Буфер попыток отправки: сброс в БД каждые N записей или T секунд.
+MAILING_ATTEMPT_BUFFER_SIZE = int(os.getenv('MAILING_ATTEMPT_BUFFER_SIZE', 500))
+MAILING_ATTEMPT_FLUSH_INTERVAL = float(os.getenv('MAILING_ATTEMPT_FLUSH_INTERVAL', 5))
+
 LOGIN_URL = "users:login"
 LOGIN_REDIRECT_URL = "home"
 LOGOUT_REDIRECT_URL = "users:login"
@@ -0,0 +1,134 @@
+import gzip
+import json
+import re
+from datetime import date
+from pathlib import Path
+
+from django.conf import settings
+from django.utils.dateparse import parse_datetime
+
+from .models import Attempt
+
+# Поля попытки, которые попадают в архив, в порядке вывода.
+ARCHIVE_FIELDS = ("id", "date", "status", "reply", "mailing_id", "client_id")
+_FILE_RE = re.compile(r"^attempts-(\d{4})-(\d{2})-(\d{2})\.jsonl\.gz$")
+
+
+def archive_root() -> Path:
+    return Path(settings.MAILING_ARCHIVE_DIR)
+
+
+def archive_path(day: date, root: Path = None) -> Path:
+    """Файл архива за сутки `day` (UTC): `<корень>/ГГГГ/ММ/attempts-ГГГГ-ММ-ДД.jsonl.gz`."""
+    root = root or archive_root()
+    return root / f"{day:%Y}" / f"{day:%m}" / f"attempts-{day:%Y-%m-%d}.jsonl.gz"
+
+
+class ArchiveWriter:
+    """Дописывает попытки в суточные gzip-файлы JSON Lines.
+
+    Попытки должны приходить отсортированными по дате: открыт всегда
+    только файл текущих суток. Файл открывается на дозапись — в gzip
+    это новый член архива, и `gzip` читает такие файлы целиком.
+    """
+
+    def __init__(self, root: Path = None):
+        self.root = root or archive_root()
+        self.files = set()
+        self.written = 0
+        self._day = None
+        self._file = None
+
+    def write(self, row: dict):
+        day = row["date"].date()
+        if day != self._day:
+            self.close()
+            path = archive_path(day, self.root)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = gzip.open(path, "at", encoding="utf-8")
+            self._day = day
+            self.files.add(path)
+        record = dict(row, date=row["date"].isoformat())
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.written += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._day = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def archive_attempts(before, root: Path = None, chunk_size: int = None, batch_size: int = None) -> dict:
+    """Выгружает попытки с `date < before` в архив и удаляет их из БД.
+
+    Строки читаются серверным курсором порциями по `chunk_size`
+    в порядке `(date, id)` и пишутся в суточные файлы. Удаление идёт
+    после того, как все файлы записаны и закрыты, диапазонами id
+    по `batch_size` — короткими транзакциями по индексу первичного ключа.
+    Удаляется только то, что попало в архив: `date < before` и id не больше
+    последнего выгруженного.
+
+    Возвращает:
+        dict: archived — выгружено строк, deleted — удалено, files — список файлов.
+    """
+    chunk_size = chunk_size or settings.MAILING_ARCHIVE_CHUNK_SIZE
+    batch_size = batch_size or settings.MAILING_ARCHIVE_DELETE_BATCH
+    rows = (
+        Attempt.objects
+        .filter(date__lt=before)
+        .order_by("date", "id")
+        .values(*ARCHIVE_FIELDS)
+        .iterator(chunk_size=chunk_size)
+    )
+    low = high = None
+    with ArchiveWriter(root) as writer:
+        for row in rows:
+            writer.write(row)
+            low = row["id"] if low is None else min(low, row["id"])
+            high = row["id"] if high is None else max(high, row["id"])
+
+    deleted = 0
+    if low is not None:
+        for start in range(low, high + 1, batch_size):
+            count, _ = Attempt.objects.filter(
+                pk__gte=start, pk__lte=min(start + batch_size - 1, high), date__lt=before,
+            ).delete()
+            deleted += count
+    return {"archived": writer.written, "deleted": deleted, "files": sorted(writer.files)}
+
+
+def iter_archived_attempts(mailing_id: int = None, start: date = None, end: date = None, root: Path = None):
+    """Построчно читает архив попыток, не загружая файлы в память целиком.
+
+    Аргументы:
+        mailing_id (int | None): только попытки этой рассылки.
+        start, end (date | None): только файлы за эти сутки включительно (UTC).
+        root (Path | None): корень архива, по умолчанию `MAILING_ARCHIVE_DIR`.
+
+    Возвращает:
+        Iterator[dict]: попытки в порядке дат; `date` — datetime.
+    """
+    root = root or archive_root()
+    files = []
+    for path in root.glob("*/*/attempts-*.jsonl.gz"):
+        match = _FILE_RE.match(path.name)
+        if not match:
+            continue
+        day = date(int(match[1]), int(match[2]), int(match[3]))
+        if (start is None or day >= start) and (end is None or day <= end):
+            files.append((day, path))
+    for _, path in sorted(files):
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            for line in file:
+                record = json.loads(line)
+                if mailing_id is not None and record["mailing_id"] != mailing_id:
+                    continue
+                record["date"] = parse_datetime(record["date"])
+                yield record
@@ -0,0 +1,145 @@
+import os
+import re
+import socket
+import threading
+import time
+from email.utils import parseaddr
+from pathlib import Path
+
+from django.conf import settings
+from django.core.mail.backends.base import BaseEmailBackend
+
+# Строки тела, начинающиеся с «From », в mbox экранируются (формат mboxrd).
+_FROM_LINE_RE = re.compile(rb"^(>*From )", re.MULTILINE)
+
+
+class RotatingFileBackend(BaseEmailBackend):
+    """Основа файловых бэкендов: пишет готовые письма на локальный диск.
+
+    Письма собираются и сериализуются так же, как для SMTP, но вместо
+    отправки сохраняются в каталог `MAILING_FILE_PATH`. Каждый экземпляр
+    бэкенда (одно «соединение» пула) пишет в свой файл или каталог,
+    поэтому потоки и процессы не мешают друг другу. После
+    `MAILING_FILE_ROTATE_BYTES` байт начинается новый файл.
+
+    fsync не вызывается: данные сбрасываются на диск операционной системой.
+    """
+
+    suffix = ""
+
+    def __init__(self, file_path: str = None, rotate_bytes: int = None, fail_silently: bool = False, **kwargs):
+        super().__init__(fail_silently=fail_silently)
+        self.path = Path(file_path or settings.MAILING_FILE_PATH)
+        self.rotate_bytes = rotate_bytes or settings.MAILING_FILE_ROTATE_BYTES
+        self.written = 0
+        self._part = 0
+        self._target = None
+        self._lock = threading.RLock()
+
+    def _target_name(self) -> str:
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        return f"{stamp}-{os.getpid()}-{id(self):x}-{self._part:04d}{self.suffix}"
+
+    def _open_target(self):
+        raise NotImplementedError
+
+    def _close_target(self):
+        self._target = None
+
+    def _write(self, message, data: bytes) -> int:
+        """Сохраняет одно письмо и возвращает число записанных байт."""
+        raise NotImplementedError
+
+    def open(self) -> bool:
+        with self._lock:
+            if self._target is not None:
+                return False
+            self.path.mkdir(parents=True, exist_ok=True)
+            self._part += 1
+            self._target = self._open_target()
+            self.written = 0
+            return True
+
+    def close(self):
+        with self._lock:
+            if self._target is not None:
+                self._close_target()
+
+    def send_messages(self, email_messages) -> int:
+        if not email_messages:
+            return 0
+        sent = 0
+        with self._lock:
+            opened = self.open()
+            try:
+                for message in email_messages:
+                    if not message.recipients():
+                        continue
+                    self.written += self._write(message, message.message().as_bytes(linesep="\n"))
+                    sent += 1
+                    if self.written >= self.rotate_bytes:
+                        self.close()
+                        self.open()
+            except Exception:
+                if not self.fail_silently:
+                    raise
+            finally:
+                if opened:
+                    self.close()
+        return sent
+
+
+class MboxBackend(RotatingFileBackend):
+    """Дописывает письма в mbox-файлы через буферизованный поток.
+
+    Python-буфер размером `MAILING_FILE_BUFFER_SIZE` сбрасывается в файл
+    крупными блоками, а не на каждое письмо.
+    """
+
+    suffix = ".mbox"
+
+    def _open_target(self):
+        return open(self.path / self._target_name(), "ab", buffering=settings.MAILING_FILE_BUFFER_SIZE)
+
+    def _close_target(self):
+        self._target.close()
+        super()._close_target()
+
+    def _write(self, message, data: bytes) -> int:
+        sender = parseaddr(message.from_email)[1] or "MAILER-DAEMON"
+        envelope = f"From {sender} {time.asctime()}\n".encode()
+        data = _FROM_LINE_RE.sub(rb">\1", data)
+        if not data.endswith(b"\n"):
+            data += b"\n"
+        self._target.write(envelope)
+        self._target.write(data)
+        self._target.write(b"\n")
+        return len(envelope) + len(data) + 1
+
+
+class MaildirBackend(RotatingFileBackend):
+    """Складывает письма в каталоги Maildir: по файлу на письмо.
+
+    Письмо пишется в `tmp/` и переносится в `new/` переименованием,
+    как того требует формат. Каталоги сменяются так же, по объёму.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._counter = 0
+        self._host = socket.gethostname().replace("/", "_").replace(":", "_")
+
+    def _open_target(self):
+        target = self.path / self._target_name()
+        for folder in ("tmp", "new", "cur"):
+            (target / folder).mkdir(parents=True, exist_ok=True)
+        return target
+
+    def _write(self, message, data: bytes) -> int:
+        self._counter += 1
+        name = f"{time.time():.6f}.P{os.getpid()}Q{self._counter}.{self._host}"
+        tmp = self._target / "tmp" / name
+        with open(tmp, "wb") as file:
+            file.write(data)
+        os.rename(tmp, self._target / "new" / name)
+        return len(data)
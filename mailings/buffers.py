@@ -0,0 +1,169 @@
+import random
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .counters import add_results
+from .models import Attempt, DeliveryRetry
+from .progress import add_progress
+from .timing import RunTimings
+
+
+def retry_delay(retries: int) -> float:
+    """Пауза перед повтором номер `retries`, в секундах.
+
+    Экспоненциальный рост от `MAILING_RETRY_BASE_DELAY` с потолком
+    `MAILING_RETRY_MAX_DELAY` и случайным разбросом в половину паузы,
+    чтобы повторы не приходили на сервер одной волной.
+    """
+    delay = min(settings.MAILING_RETRY_MAX_DELAY, settings.MAILING_RETRY_BASE_DELAY * 2 ** (retries - 1))
+    return random.uniform(delay / 2, delay)
+
+
+class AttemptBuffer:
+    """Буфер отложенной записи попыток отправки.
+
+    Копит результаты в памяти и сохраняет их одним `bulk_create`,
+    когда набралось `size` записей или прошло `interval` секунд
+    с последнего сброса. При выходе из контекста (в том числе по
+    исключению) оставшиеся записи сохраняются.
+
+    Так же копятся и запланированные повторные отправки (`DeliveryRetry`).
+    В той же транзакции, что и вставка попыток, одним `UPDATE` на рассылку
+    увеличиваются счётчики `Mailing.succeeded_count`/`failed_count`.
+    После сброса счётчики прогресса рассылок в кэше увеличиваются
+    одним вызовом на рассылку, а не на каждое письмо. Время сбросов замеряется в `timings` как фаза «Запись попыток».
+
+    Пока буфер открыт (`with` или `start()`/`close()`), фоновый поток сбрасывает его
+    по таймеру, даже если новых результатов нет: отправка может надолго
+    зависнуть на медленном сервере. Поэтому попытка лежит в памяти
+    не дольше `interval` секунд плюс время записи, и сводки, которые
+    отстают на `MAILING_ROLLUP_LAG`, её не пропускают. Ошибка фонового
+    сброса пробрасывается при следующем обращении к буферу.
+    """
+
+    def __init__(self, size: int = None, interval: float = None, timings: RunTimings = None):
+        self.size = size or settings.MAILING_ATTEMPT_BUFFER_SIZE
+        self.interval = interval or settings.MAILING_ATTEMPT_FLUSH_INTERVAL
+        self.timings = RunTimings() if timings is None else timings
+        self._pending = []
+        self._retries = []
+        self._flushed_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._timer = None
+        self._error = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self):
+        return len(self._pending) + len(self._retries)
+
+    def start(self):
+        """Запускает фоновый сброс по таймеру."""
+        if self._timer is None:
+            self._stopped.clear()
+            self._timer = threading.Thread(target=self._flush_periodically, name="attempt-buffer", daemon=True)
+            self._timer.start()
+
+    def stop(self):
+        """Останавливает фоновый сброс, не сохраняя оставшиеся записи."""
+        if self._timer is not None:
+            self._stopped.set()
+            self._timer.join()
+            self._timer = None
+
+    def close(self):
+        """Останавливает фоновый сброс и сохраняет оставшиеся записи."""
+        self.stop()
+        self._raise_timer_error()
+        self.flush()
+
+    def _flush_periodically(self):
+        try:
+            while not self._stopped.wait(max(0.0, self._flushed_at + self.interval - time.monotonic())):
+                if time.monotonic() - self._flushed_at >= self.interval:
+                    self.flush()
+        except Exception as e:
+            self._error = e
+        finally:
+            # У потока своё соединение с БД: закрываем его, а не оставляем висеть.
+            connections.close_all()
+
+    def _raise_timer_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _maybe_flush(self):
+        self._raise_timer_error()
+        if len(self) >= self.size or time.monotonic() - self._flushed_at >= self.interval:
+            self.flush()
+
+    def add(self, **fields):
+        """Добавляет попытку в буфер и при необходимости сбрасывает его."""
+        fields.setdefault("date", timezone.now())
+        with self._lock:
+            self._pending.append(Attempt(**fields))
+        self._maybe_flush()
+
+    def schedule_retry(self, mailing_id: int, client_id: int, retries: int, error: Exception):
+        """Планирует повтор номер `retries` с экспоненциальной паузой."""
+        retry = DeliveryRetry(
+            mailing_id=mailing_id,
+            client_id=client_id,
+            retries=retries,
+            next_try_at=timezone.now() + timedelta(seconds=retry_delay(retries)),
+            last_error=str(error),
+        )
+        with self._lock:
+            self._retries.append(retry)
+        self._maybe_flush()
+
+    def flush(self):
+        """Сохраняет накопленные попытки и повторы в БД пачками."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        pending, self._pending = self._pending, []
+        retries, self._retries = self._retries, []
+        self._flushed_at = time.monotonic()
+        if not pending and not retries:
+            return
+        counts = Counter((attempt.mailing_id, attempt.status) for attempt in pending)
+        mailing_ids = {mailing_id for mailing_id, _ in counts}
+        with self.timings.measure("record"), transaction.atomic():
+            if pending:
+                Attempt.objects.bulk_create(pending, batch_size=self.size)
+                for mailing_id in mailing_ids:
+                    add_results(
+                        mailing_id,
+                        succeeded=counts[mailing_id, Attempt.Status.SUCCEEDED],
+                        failed=counts[mailing_id, Attempt.Status.FAILED],
+                    )
+            if retries:
+                # Повтор для пары (рассылка, получатель) один: новый заменяет старый.
+                DeliveryRetry.objects.bulk_create(
+                    retries,
+                    batch_size=self.size,
+                    update_conflicts=True,
+                    unique_fields=["mailing", "client"],
+                    update_fields=["retries", "next_try_at", "last_error"],
+                )
+        for mailing_id in mailing_ids:
+            add_progress(
+                mailing_id,
+                ok=counts[mailing_id, Attempt.Status.SUCCEEDED],
+                failed=counts[mailing_id, Attempt.Status.FAILED],
+            )
@@ -0,0 +1,107 @@
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Attempt, HourlyAttemptRollup, Mailing, RollupWatermark
+from .rollups import WATERMARK
+
+# Денормализованные счётчики рассылки, которые читает страница статистики.
+COUNTER_FIELDS = ("recipients_count", "succeeded_count", "failed_count")
+
+
+def add_recipients(mailing_ids, delta: int):
+    """Сдвигает число получателей рассылок `mailing_ids` на `delta`."""
+    if not mailing_ids or not delta:
+        return
+    Mailing.objects.filter(pk__in=mailing_ids).update(
+        recipients_count=Greatest(F("recipients_count") + delta, Value(0)),
+    )
+
+
+def add_results(mailing_id: int, succeeded: int = 0, failed: int = 0):
+    """Увеличивает счётчики успешных и неуспешных попыток одним `UPDATE`."""
+    if not succeeded and not failed:
+        return
+    Mailing.objects.filter(pk=mailing_id).update(
+        succeeded_count=F("succeeded_count") + succeeded,
+        failed_count=F("failed_count") + failed,
+    )
+
+
+def _count(queryset):
+    """Коррелированный подзапрос `COUNT(*)` по рассылке для аннотации."""
+    counted = queryset.filter(mailing=OuterRef("pk")).order_by().values("mailing").annotate(n=Count("*")).values("n")
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+
+def _rolled(status: str):
+    """Коррелированный подзапрос: сколько попыток рассылки со статусом `status` учтено в сводках."""
+    summed = (
+        HourlyAttemptRollup.objects
+        .filter(mailing=OuterRef("pk"), status=status)
+        .order_by().values("mailing").annotate(n=Sum("count")).values("n")
+    )
+    return Coalesce(Subquery(summed, output_field=IntegerField()), 0)
+
+
+def actual_counts(rolled_until=None):
+    """Аннотации с настоящими значениями счётчиков, посчитанными по таблицам.
+
+    Если задана отметка сводок `rolled_until`, попытки до неё берутся
+    из почасовых сводок, а из `Attempt` читаются только более новые:
+    старые попытки могли уйти в архив (`archive_attempts`) или вместе
+    с секцией (`manage_attempt_partitions`), а сводки их сохраняют.
+    """
+    counts = {"actual_recipients": _count(Mailing.clients.through.objects.all())}
+    for name, status in (("actual_succeeded", Attempt.Status.SUCCEEDED), ("actual_failed", Attempt.Status.FAILED)):
+        attempts = Attempt.objects.filter(status=status)
+        if rolled_until is None:
+            counts[name] = _count(attempts)
+        else:
+            counts[name] = _rolled(status) + _count(attempts.filter(date__gt=rolled_until))
+    return counts
+
+
+def recount(mailings=None, batch_size: int = 1000) -> int:
+    """Пересчитывает счётчики рассылок и исправляет расхождения.
+
+    Рассылки обрабатываются пачками по `batch_size`; строки пачки
+    блокируются (`SELECT ... FOR UPDATE`), поэтому одновременные
+    приращения от идущей отправки не теряются, а ждут конца пересчёта.
+    Попытки, уже учтённые в сводках, считаются по сводкам (см. `actual_counts`),
+    так что архивация и удаление старых попыток счётчики не уменьшают.
+    Отметка сводок блокируется на время пачки, чтобы `roll_up` не сдвинул
+    её посреди подсчёта.
+
+    Аргументы:
+        mailings (QuerySet | None): какие рассылки пересчитать; по умолчанию все.
+        batch_size (int): размер пачки.
+
+    Возвращает:
+        int: сколько рассылок пришлось исправить.
+    """
+    mailings = Mailing.objects.all() if mailings is None else mailings
+    pks = list(mailings.order_by("pk").values_list("pk", flat=True))
+    fixed = 0
+    for start in range(0, len(pks), batch_size):
+        with transaction.atomic():
+            rolled_until = (
+                RollupWatermark.objects.select_for_update()
+                .filter(name=WATERMARK).values_list("value", flat=True).first()
+            )
+            batch = list(
+                Mailing.objects
+                .select_for_update()
+                .filter(pk__in=pks[start:start + batch_size])
+                .only("pk", *COUNTER_FIELDS)
+                .annotate(**actual_counts(rolled_until))
+            )
+            drifted = []
+            for mailing in batch:
+                actual = (mailing.actual_recipients, mailing.actual_succeeded, mailing.actual_failed)
+                if actual != tuple(getattr(mailing, field) for field in COUNTER_FIELDS):
+                    mailing.recipients_count, mailing.succeeded_count, mailing.failed_count = actual
+                    drifted.append(mailing)
+            Mailing.objects.bulk_update(drifted, COUNTER_FIELDS)
+            fixed += len(drifted)
+    return fixed
@@ -0,0 +1,142 @@
+import json
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import connections
+
+from .models import Client, CountSnapshot
+from .sketches import count_emails
+
+# Имя сохранённого показателя: уникальные адреса среди клиентов всех пользователей.
+UNIQUE_EMAILS = "unique_emails"
+
+
+class Estimate(NamedTuple):
+    """Число строк и точное ли оно; в шаблоне оценка выводится как «≈ N»."""
+    value: int
+    exact: bool
+
+    def __str__(self):
+        return str(self.value) if self.exact else f"≈ {self.value}"
+
+
+def table_estimate(model, using: str = "default"):
+    """Оценка числа строк таблицы `model` из `pg_class.reltuples`.
+
+    Значение обновляют ANALYZE и autovacuum. У секционированной таблицы
+    складываются секции. None — не PostgreSQL или таблица ещё
+    не анализировалась.
+    """
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return None
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT sum(reltuples) FROM pg_class WHERE reltuples >= 0 "
+            "AND (oid = %s::regclass OR oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = %s::regclass))",
+            [table, table],
+        )
+        value = cursor.fetchone()[0]
+    return None if value is None else int(value)
+
+
+def query_estimate(queryset):
+    """Оценка числа строк выборки по плану запроса (`EXPLAIN`, без выполнения).
+
+    None — не PostgreSQL.
+    """
+    if connections[queryset.db].vendor != "postgresql":
+        return None
+    plan = json.loads(queryset.order_by().explain(format="json"))
+    # Django отдаёт план без внешнего списка из EXPLAIN; на случай другой версии принимаем оба вида.
+    if isinstance(plan, list):
+        plan = plan[0]
+    return int(plan["Plan"]["Plan Rows"])
+
+
+def distinct_estimate(model, field: str, using: str = "default"):
+    """Оценка числа различных значений колонки из статистики планировщика (`pg_stats.n_distinct`).
+
+    Отрицательное `n_distinct` — доля от числа строк. None — не PostgreSQL
+    или статистики ещё нет.
+    """
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT n_distinct FROM pg_stats WHERE schemaname = current_schema() AND tablename = %s AND attname = %s",
+            [model._meta.db_table, model._meta.get_field(field).column],
+        )
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    if row[0] >= 0:
+        return int(row[0])
+    rows = table_estimate(model, using)
+    return None if rows is None else int(-row[0] * rows)
+
+
+def estimate_count(queryset, threshold: int = None) -> Estimate:
+    """Число строк выборки: оценка для больших выборок, точный `COUNT` для маленьких.
+
+    Выборка без условий оценивается по `pg_class.reltuples`, с условиями —
+    по плану запроса. Если оценки нет (не PostgreSQL, таблица не анализировалась)
+    или она меньше `threshold` (по умолчанию `MAILING_EXACT_COUNT_THRESHOLD`),
+    выполняется точный подсчёт — он заведомо дешёвый.
+
+    Аргументы:
+        queryset (QuerySet): что считать.
+        threshold (int | None): с какого размера довольствоваться оценкой.
+
+    Возвращает:
+        Estimate: значение и признак точности.
+    """
+    threshold = settings.MAILING_EXACT_COUNT_THRESHOLD if threshold is None else threshold
+    if not queryset.query.where and not queryset.query.distinct:
+        estimate = table_estimate(queryset.model, queryset.db)
+    else:
+        estimate = query_estimate(queryset)
+    if estimate is not None and estimate >= threshold:
+        return Estimate(estimate, exact=False)
+    return Estimate(queryset.count(), exact=True)
+
+
+def unique_emails(owner=None, threshold: int = None) -> Estimate:
+    """Число уникальных адресов среди клиентов владельца `owner` или всех пользователей.
+
+    Пока клиентов меньше порога, считается точно. Иначе берётся оценка
+    HyperLogLog из Redis (`mailings/sketches.py`). Без неё у владельца
+    адреса уникальны по ограничению `uniq_owner_email` и считаются
+    по индексу, а для всех пользователей берётся значение, сохранённое
+    командой `refresh_counts`, или оценка из статистики планировщика.
+    Оценка не больше числа клиентов.
+    """
+    queryset = Client.objects.all() if owner is None else Client.objects.filter(owner=owner)
+    clients = estimate_count(queryset, threshold)
+    if clients.exact:
+        return Estimate(queryset.values("email").distinct().count(), exact=True)
+    value = count_emails(None if owner is None else [owner.pk])
+    if value is not None:
+        return Estimate(min(value, clients.value), exact=False)
+    if owner is not None:
+        return Estimate(queryset.count(), exact=True)
+    value = CountSnapshot.objects.filter(name=UNIQUE_EMAILS).values_list("value", flat=True).first()
+    if value is None:
+        value = distinct_estimate(Client, "email")
+    if value is None:
+        return Estimate(Client.objects.values("email").distinct().count(), exact=True)
+    return Estimate(min(value, clients.value), exact=False)
+
+
+def refresh_counts() -> dict:
+    """Пересчитывает сохранённые показатели точно (полным проходом) и сохраняет их.
+
+    Возвращает:
+        dict: имя показателя → новое значение.
+    """
+    values = {UNIQUE_EMAILS: Client.objects.values("email").distinct().count()}
+    for name, value in values.items():
+        CountSnapshot.objects.update_or_create(name=name, defaults={"value": value})
+    return values
@@ -1,5 +1,6 @@
 from django import forms
 from .models import Client, Message, Mailing
+from .templating import TEMPLATE_FIELDS, unknown_placeholders
 from django.core.exceptions import ValidationError
 
 
@@ -17,10 +18,34 @@ class ClientForm(forms.ModelForm):
 
 
 class MessageForm(forms.ModelForm):
-    """Форма для создания и редактирования сообщений рассылки."""
+    """Форма для создания и редактирования сообщений рассылки.
+
+    Проверяет, что в теме и тексте используются только известные
+    подстановки: {{ full_name }} и {{ email }}.
+    """
     class Meta:
         model = Message
         fields = ['topic', 'body']
+        help_texts = {
+            'topic': 'Можно подставить {{ full_name }} и {{ email }} получателя.',
+            'body': 'Можно подставить {{ full_name }} и {{ email }} получателя.',
+        }
+
+    def _check_placeholders(self, field):
+        value = self.cleaned_data[field]
+        unknown = unknown_placeholders(value)
+        if unknown:
+            allowed = ", ".join("{{ %s }}" % name for name in TEMPLATE_FIELDS)
+            raise ValidationError(
+                f"Неизвестные подстановки: {', '.join(unknown)}. Доступны: {allowed}."
+            )
+        return value
+
+    def clean_topic(self):
+        return self._check_placeholders('topic')
+
+    def clean_body(self):
+        return self._check_placeholders('body')
 
 
 class MailingForm(forms.ModelForm):
@@ -0,0 +1,167 @@
+import logging
+import os
+import socket
+import threading
+import uuid
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Mailing
+
+logger = logging.getLogger(__name__)
+
+
+class MailingBusy(Exception):
+    """Рассылку уже отправляет другой отправитель.
+
+    Атрибуты:
+        owner (str): кто держит аренду.
+        expires_at (datetime): до какого момента аренда действует.
+    """
+
+    def __init__(self, mailing_id: int, owner: str, expires_at):
+        self.owner = owner
+        self.expires_at = expires_at
+        super().__init__(
+            f"Рассылку #{mailing_id} уже отправляет {owner} "
+            f"(аренда до {timezone.localtime(expires_at):%H:%M:%S})"
+        )
+
+
+class LeaseLost(Exception):
+    """Аренда рассылки истекла или перешла к другому отправителю."""
+
+
+class MailingLease:
+    """Аренда рассылки на время отправки.
+
+    Захват — условный `UPDATE`: строка рассылки обновляется, только если
+    аренды нет или она истекла, поэтому из нескольких процессов и хостов
+    рассылку получает ровно один. Пока аренда удерживается, фоновый поток
+    продлевает её каждые `MAILING_LEASE_HEARTBEAT` секунд на
+    `MAILING_LEASE_TTL` секунд. Если отправитель упал, аренда истекает
+    и рассылку забирает следующий; такой захват помечается `reclaimed`,
+    и отправка продолжается как докачка.
+
+    Используется как контекстный менеджер; если рассылка занята,
+    выбрасывается `MailingBusy`.
+    """
+
+    def __init__(self, mailing: Mailing, ttl: float = None, heartbeat: float = None):
+        self.mailing_id = mailing.pk
+        self.ttl = timedelta(seconds=ttl or settings.MAILING_LEASE_TTL)
+        self.heartbeat = heartbeat or settings.MAILING_LEASE_HEARTBEAT
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.reclaimed = False
+        self.lost = False
+        self.holder = ""
+        self.holder_expires_at = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def acquire(self) -> bool:
+        """Пытается захватить аренду.
+
+        Возвращает:
+            bool: True, если аренда получена; иначе текущий арендатор
+            остаётся в `holder` и `holder_expires_at`.
+        """
+        now = timezone.now()
+        self.holder, self.holder_expires_at = (
+            Mailing.objects.filter(pk=self.mailing_id).values_list("lease_owner", "lease_expires_at").get()
+        )
+        if self.holder and self.holder_expires_at and self.holder_expires_at > now:
+            return False
+        # Сравнение с прочитанным арендатором: из двух одновременных захватов
+        # истёкшей аренды строку обновит только первый.
+        claimed = (
+            Mailing.objects
+            .filter(pk=self.mailing_id, lease_owner=self.holder)
+            .filter(Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lte=now))
+            .update(lease_owner=self.owner, lease_expires_at=now + self.ttl)
+        )
+        if not claimed:
+            # Опередил другой отправитель — запоминаем его.
+            self.holder, self.holder_expires_at = (
+                Mailing.objects.filter(pk=self.mailing_id).values_list("lease_owner", "lease_expires_at").get()
+            )
+            return False
+        self.reclaimed = bool(self.holder)
+        return True
+
+    def renew(self) -> bool:
+        """Продлевает аренду; False — аренда уже принадлежит другому."""
+        renewed = (
+            Mailing.objects
+            .filter(pk=self.mailing_id, lease_owner=self.owner)
+            .update(lease_expires_at=timezone.now() + self.ttl)
+        )
+        if not renewed:
+            self.lost = True
+        return bool(renewed)
+
+    def release(self):
+        """Освобождает аренду, если она ещё наша."""
+        Mailing.objects.filter(pk=self.mailing_id, lease_owner=self.owner).update(
+            lease_owner="", lease_expires_at=None,
+        )
+
+    def check(self):
+        """Выбрасывает `LeaseLost`, если аренда потеряна и отправку надо прервать."""
+        if self.lost:
+            raise LeaseLost(f"Аренда рассылки #{self.mailing_id} потеряна")
+
+    def _beat(self):
+        while not self._stop.wait(self.heartbeat):
+            try:
+                if not self.renew():
+                    logger.error("Аренда рассылки #%s перешла к другому отправителю", self.mailing_id)
+                    return
+            except Exception:
+                # Продлим на следующем шаге; если БД недоступна дольше TTL, аренда истечёт.
+                logger.warning("Не удалось продлить аренду рассылки #%s", self.mailing_id, exc_info=True)
+            finally:
+                # Не держим соединение между продлениями: процесс может форкаться (--processes).
+                connection.close()
+
+    def start_heartbeat(self):
+        """Запускает фоновый поток продления аренды."""
+        if self._thread is not None:
+            return
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._beat, name=f"lease-{self.mailing_id}", daemon=True)
+        self._thread.start()
+
+    def stop_heartbeat(self):
+        """Останавливает поток продления и ждёт его завершения.
+
+        Нужно перед `fork`: дочерний процесс многопоточного родителя может
+        унаследовать блокировки, захваченные этим потоком (соединение с БД,
+        logging). Остановка короче `MAILING_LEASE_TTL` аренду не теряет.
+        """
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def __enter__(self):
+        if not self.acquire():
+            raise MailingBusy(self.mailing_id, self.holder, self.holder_expires_at)
+        self.start_heartbeat()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop_heartbeat()
+        self.release()
+
+    async def __aenter__(self):
+        return await sync_to_async(self.__enter__)()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await sync_to_async(self.__exit__)(exc_type, exc, tb)
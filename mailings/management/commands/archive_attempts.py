@@ -0,0 +1,37 @@
+from datetime import datetime, time, timezone as dt_timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from mailings.archive import archive_attempts, archive_root
+from mailings.rollups import watermark
+
+
+class Command(BaseCommand):
+    help = (
+        "Выгружает попытки старше даты в сжатые суточные файлы JSON Lines в MAILING_ARCHIVE_DIR "
+        "и удаляет их из БД: python manage.py archive_attempts --before 2026-01-01"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--before", required=True, help="Дата ГГГГ-ММ-ДД (UTC): архивировать попытки до неё")
+
+    def handle(self, *args, **options):
+        day = parse_date(options["before"] or "")
+        if day is None:
+            raise CommandError("--before должен быть датой в формате ГГГГ-ММ-ДД")
+        before = datetime.combine(day, time.min, tzinfo=dt_timezone.utc)
+        if before > timezone.now():
+            raise CommandError("--before не может быть в будущем")
+        # Иначе невыгруженные в сводки попытки пропадут и из графиков статистики.
+        rolled_up = watermark()
+        if rolled_up is None or rolled_up < before:
+            raise CommandError("Сводки ещё не учли эти попытки: сначала выполните rollup_attempts --once")
+
+        self.stdout.write(f"Архивируем попытки до {before:%Y-%m-%d} в {archive_root()}…")
+        result = archive_attempts(before)
+        for path in result["files"]:
+            self.stdout.write(f"  {path}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Готово. Выгружено {result['archived']}, удалено из БД {result['deleted']}."
+        ))
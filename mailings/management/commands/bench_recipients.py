@@ -0,0 +1,47 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from mailings.models import Mailing
+from mailings.services.sending import iter_recipients
+
+
+def _measure(iterate) -> tuple:
+    """Возвращает (пиковая память в байтах, время в секундах, число строк)."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    count = iterate()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, elapsed, count
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает память при обходе получателей рассылки: модели Client целиком "
+        "против потокового чтения кортежей. python manage.py bench_recipients <mailing_id>"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("mailing_id", type=int)
+
+    def handle(self, *args, **options):
+        mailing_id = options["mailing_id"]
+        try:
+            mailing = Mailing.objects.get(pk=mailing_id)
+        except Mailing.DoesNotExist:
+            raise CommandError(f"Рассылка #{mailing_id} не найдена")
+
+        def models():
+            # Так получателей обходил send_mailing_now раньше.
+            return sum(1 for client in mailing.clients.all() if client.email)
+
+        def rows():
+            return sum(1 for client in iter_recipients(mailing.clients.all()) if client.email)
+
+        for title, iterate in (("Модели Client", models), ("Потоковые кортежи", rows)):
+            peak, elapsed, count = _measure(iterate)
+            self.stdout.write(
+                f"{title:<20} строк {count:>9}, пик памяти {peak / 1024 / 1024:8.2f} МБ, время {elapsed:6.2f} с"
+            )
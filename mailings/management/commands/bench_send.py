@@ -0,0 +1,173 @@
+import resource
+import tempfile
+import time
+from contextlib import ExitStack, contextmanager
+from datetime import timedelta
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from mailings.models import Client, Mailing, Message
+from mailings.services import send_mailing_now
+from mailings.sink import SMTPSink
+from mailings.smtp import SMTPConnectionPool
+
+BENCH_OWNER_EMAIL = "bench-send@localhost"
+
+# Файловые бэкенды, которыми можно заменить SMTP-заглушку (--transport).
+FILE_TRANSPORTS = {
+    "mbox": "mailings.backends.MboxBackend",
+    "maildir": "mailings.backends.MaildirBackend",
+}
+
+SAMPLE_BODY = (
+    "Здравствуйте, {{ full_name }}! Благодарим вас за то, что остаётесь с нами. "
+    "В этом месяце мы подготовили для постоянных клиентов скидки на все тарифы.\n\n"
+) * 20
+
+
+@contextmanager
+def _timed_sends(samples: list):
+    """Замеряет длительность каждого вызова `SMTPConnectionPool.send`."""
+    original = SMTPConnectionPool.send
+
+    def send(pool, message):
+        started = time.perf_counter()
+        try:
+            return original(pool, message)
+        finally:
+            samples.append(time.perf_counter() - started)
+
+    SMTPConnectionPool.send = send
+    try:
+        yield
+    finally:
+        SMTPConnectionPool.send = original
+
+
+def _percentile(samples: list, percent: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет пропускную способность отправки на локальном SMTP-сервере-заглушке "
+        "или в файловом бэкенде (--transport mbox|maildir): "
+        "создаёт N клиентов, запускает send_mailing_now и выводит писем в секунду, "
+        "p50/p99 задержки письма, число запросов к БД и пиковую память процесса. "
+        "python manage.py bench_send --clients 1000 --latency 20"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--transport", choices=["smtp", *FILE_TRANSPORTS], default="smtp",
+            help="Куда отправлять: SMTP-заглушка или файлы во временном каталоге",
+        )
+        parser.add_argument("--clients", type=int, default=1000, help="Сколько клиентов создать")
+        parser.add_argument("--concurrency", type=int, default=1, help="Число потоков отправки")
+        parser.add_argument("--latency", type=float, default=0, help="Задержка ответа сервера, мс")
+        parser.add_argument("--jitter", type=float, default=0, help="Случайная добавка к задержке, мс")
+        parser.add_argument("--temp-errors", type=float, default=0, help="Доля ответов 451, от 0 до 1")
+        parser.add_argument("--perm-errors", type=float, default=0, help="Доля ответов 550, от 0 до 1")
+        parser.add_argument("--disconnects", type=float, default=0, help="Доля обрывов соединения, от 0 до 1")
+        parser.add_argument("--keep", action="store_true", help="Не удалять созданные данные после замера")
+
+    def handle(self, *args, **options):
+        mailing = self._seed(options["clients"])
+        samples = []
+        try:
+            with ExitStack() as stack:
+                describe = stack.enter_context(self._transport(options))
+                stack.enter_context(_timed_sends(samples))
+                queries = stack.enter_context(CaptureQueriesContext(connection))
+                started = time.perf_counter()
+                stats = send_mailing_now(mailing, concurrency=options["concurrency"])
+                elapsed = time.perf_counter() - started
+                transport = describe()
+        finally:
+            if not options["keep"]:
+                self._cleanup(mailing)
+
+        # На Linux ru_maxrss — в килобайтах.
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        self.stdout.write(f"Отправлено {stats['ok']} из {stats['total']}, ошибок {stats['failed']} ({transport})")
+        self.stdout.write(f"Время           {elapsed:10.2f} с")
+        self.stdout.write(f"Писем в секунду {stats['total'] / elapsed if elapsed else 0:10.1f}")
+        self.stdout.write(f"p50 письма      {_percentile(samples, 50) * 1000:10.2f} мс")
+        self.stdout.write(f"p99 письма      {_percentile(samples, 99) * 1000:10.2f} мс")
+        self.stdout.write(f"Запросов к БД   {len(queries):10d}")
+        self.stdout.write(f"Пик памяти      {peak_rss:10.1f} МБ")
+
+    @contextmanager
+    def _transport(self, options):
+        """Подменяет почтовые настройки на время замера.
+
+        Возвращает (через yield) функцию, описывающую итог на стороне
+        получателя: статистику заглушки или объём записанных файлов.
+        """
+        backend = FILE_TRANSPORTS.get(options["transport"])
+        if backend:
+            with tempfile.TemporaryDirectory(prefix="bench-send-") as path, override_settings(
+                MAILING_EMAIL_BACKEND=backend,
+                MAILING_FILE_PATH=path,
+                DEFAULT_FROM_EMAIL="bench@localhost",
+            ):
+                def describe():
+                    files = [item for item in Path(path).rglob("*") if item.is_file()]
+                    size = sum(item.stat().st_size for item in files) / 1024 / 1024
+                    return f"{options['transport']}: файлов {len(files)}, {size:.1f} МБ"
+
+                yield describe
+            return
+
+        sink = SMTPSink(
+            latency=options["latency"] / 1000,
+            jitter=options["jitter"] / 1000,
+            temp_error_rate=options["temp_errors"],
+            perm_error_rate=options["perm_errors"],
+            disconnect_rate=options["disconnects"],
+        )
+        with sink, override_settings(
+            MAILING_EMAIL_BACKEND=None,
+            EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+            EMAIL_HOST=sink.host,
+            EMAIL_PORT=sink.port,
+            EMAIL_HOST_USER="",
+            EMAIL_HOST_PASSWORD="",
+            EMAIL_USE_TLS=False,
+            EMAIL_USE_SSL=False,
+            DEFAULT_FROM_EMAIL="bench@localhost",
+        ):
+            yield lambda: f"сервер: соединений {sink.stats['connections']}, обрывов {sink.stats['disconnects']}"
+
+    def _seed(self, count: int) -> Mailing:
+        owner, _ = get_user_model().objects.get_or_create(
+            email=BENCH_OWNER_EMAIL, defaults={"username": BENCH_OWNER_EMAIL},
+        )
+        # Клиенты прошлого замера, оставленные с --keep, мешают уникальности email.
+        Client.objects.filter(owner=owner).delete()
+        message = Message.objects.create(topic="Замер отправки", body=SAMPLE_BODY, owner=owner)
+        now = timezone.now()
+        mailing = Mailing.objects.create(
+            start_time=now, end_time=now + timedelta(hours=1), message=message, owner=owner,
+        )
+        domains = ("example.com", "example.org", "example.net")
+        clients = Client.objects.bulk_create(
+            Client(email=f"client{i}@{domains[i % len(domains)]}", full_name=f"Клиент {i}", owner=owner)
+            for i in range(count)
+        )
+        mailing.clients.add(*clients)
+        self.stdout.write(f"Создана рассылка #{mailing.pk} на {count} клиентов.")
+        return mailing
+
+    def _cleanup(self, mailing: Mailing):
+        owner = mailing.owner
+        Client.objects.filter(owner=owner).delete()
+        mailing.delete()
+        mailing.message.delete()
@@ -0,0 +1,74 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from mailings.partitions import (
+    add_months, create_partition, is_partitioned, month_start, monthly_partitions, partition_end, partition_name,
+    remove_partition,
+)
+from mailings.rollups import watermark
+
+
+class Command(BaseCommand):
+    help = (
+        "Обслуживает помесячные секции таблицы попыток (PostgreSQL): создаёт секции "
+        "на MAILING_ATTEMPT_PARTITIONS_AHEAD месяцев вперёд и удаляет или отсоединяет "
+        "секции старше MAILING_ATTEMPT_RETENTION_MONTHS месяцев. Запускайте раз в сутки"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--ahead", type=int, default=settings.MAILING_ATTEMPT_PARTITIONS_AHEAD,
+            help="На сколько месяцев вперёд создать секции",
+        )
+        parser.add_argument(
+            "--retention", type=int, default=settings.MAILING_ATTEMPT_RETENTION_MONTHS,
+            help="Сколько месяцев хранить попытки; 0 — хранить всё",
+        )
+        parser.add_argument(
+            "--detach", action="store_true",
+            help="Отсоединять устаревшие секции в отдельные таблицы вместо удаления",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Только показать, что будет сделано")
+
+    def handle(self, *args, **options):
+        if not is_partitioned():
+            raise CommandError("Таблица попыток не секционирована: нужен PostgreSQL и миграция 0017_partition_attempt")
+
+        this_month = month_start(timezone.now())
+        existing = monthly_partitions()
+        to_create = [
+            month for month in (add_months(this_month, i) for i in range(options["ahead"] + 1))
+            if month not in existing
+        ]
+        expired = []
+        if options["retention"] > 0:
+            # Секция устарела, если весь её месяц раньше границы хранения.
+            oldest_kept = add_months(this_month, -options["retention"] + 1)
+            expired = sorted(month for month in existing if month < oldest_kept)
+        # Секцию, попытки которой ещё не учли сводки, не трогаем: иначе они пропадут
+        # и из графиков статистики, и из recount.
+        rolled_up = watermark()
+        not_rolled = [month for month in expired if rolled_up is None or partition_end(month) > rolled_up]
+        expired = [month for month in expired if month not in not_rolled]
+
+        action, done = ("Отсоединить", "отсоединено") if options["detach"] else ("Удалить", "удалено")
+        for month in to_create:
+            self.stdout.write(f"Создать {partition_name(month)}")
+        for month in not_rolled:
+            self.stdout.write(self.style.WARNING(
+                f"Пропустить {existing[month]}: сводки ещё не учли её попытки, сначала выполните rollup_attempts --once"
+            ))
+        for month in expired:
+            self.stdout.write(f"{action} {existing[month]}")
+        if options["dry_run"]:
+            return
+
+        with transaction.atomic():
+            for month in to_create:
+                create_partition(month)
+            for month in expired:
+                remove_partition(existing[month], detach=options["detach"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Готово. Создано секций: {len(to_create)}, {done}: {len(expired)}."
+        ))
@@ -0,0 +1,31 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from mailings.archive import iter_archived_attempts
+
+
+class Command(BaseCommand):
+    help = (
+        "Печатает попытки из архива archive_attempts в формате JSON Lines, читая файлы потоково: "
+        "python manage.py read_attempt_archive --mailing 42 [--from 2025-01-01] [--to 2025-12-31]"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--mailing", type=int, help="Только попытки этой рассылки")
+        parser.add_argument("--from", dest="start", help="С даты ГГГГ-ММ-ДД (UTC)")
+        parser.add_argument("--to", dest="end", help="По дату ГГГГ-ММ-ДД включительно (UTC)")
+
+    def handle(self, *args, **options):
+        bounds = {}
+        for name in ("start", "end"):
+            if options[name]:
+                bounds[name] = parse_date(options[name])
+                if bounds[name] is None:
+                    raise CommandError("Даты указываются в формате ГГГГ-ММ-ДД")
+        count = 0
+        for record in iter_archived_attempts(options["mailing"], **bounds):
+            record["date"] = record["date"].isoformat()
+            self.stdout.write(json.dumps(record, ensure_ascii=False))
+            count += 1
+        self.stderr.write(f"Найдено попыток: {count}")
@@ -0,0 +1,29 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from mailings.sketches import rebuild_sketches
+
+
+class Command(BaseCommand):
+    help = (
+        "Заново строит в Redis HyperLogLog-оценки числа уникальных адресов клиентов "
+        "(по владельцам и общую) по таблице клиентов. Запускайте после первого "
+        "развёртывания и периодически, чтобы убрать из оценок удалённые адреса"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Размер порции серверного курсора",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            result = rebuild_sketches(batch_size=options["batch_size"])
+        except ImproperlyConfigured as e:
+            raise CommandError(str(e))
+        self.stdout.write(
+            f"Владельцев: {result['owners']}, клиентов: {result['clients']}, "
+            f"уникальных адресов (оценка): {result['unique']}."
+        )
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from mailings.counters import recount
+from mailings.models import Mailing
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает счётчики рассылок (получатели, успешные и неуспешные попытки) "
+        "по таблицам и исправляет расхождения: python manage.py recount [--mailing ID]"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--mailing", type=int, action="append", help="Пересчитать только эту рассылку")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Рассылок в одной транзакции")
+
+    def handle(self, *args, **options):
+        mailings = Mailing.objects.all()
+        if options["mailing"]:
+            mailings = mailings.filter(pk__in=options["mailing"])
+        fixed = recount(mailings, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Готово. Исправлено рассылок: {fixed}."))
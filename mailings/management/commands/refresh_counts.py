@@ -0,0 +1,33 @@
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from mailings.estimates import refresh_counts
+
+
+class Command(BaseCommand):
+    help = (
+        "Точно пересчитывает дорогие показатели главной страницы (число уникальных "
+        "адресов клиентов) и сохраняет их. По умолчанию работает постоянно, "
+        "раз в MAILING_COUNT_REFRESH_INTERVAL секунд"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Выполнить один пересчёт и завершиться",
+        )
+
+    def handle(self, *args, **options):
+        self._stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: self._stop.set())
+        signal.signal(signal.SIGINT, lambda *_: self._stop.set())
+
+        while not self._stop.is_set():
+            values = refresh_counts()
+            self.stdout.write(", ".join(f"{name}: {value}" for name, value in values.items()))
+            if options["once"]:
+                break
+            self._stop.wait(settings.MAILING_COUNT_REFRESH_INTERVAL)
@@ -0,0 +1,47 @@
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from mailings.rollups import rebuild, roll_up
+
+
+class Command(BaseCommand):
+    help = (
+        "Переносит новые попытки отправки в почасовые и посуточные сводки "
+        "(только попытки новее сохранённой отметки). По умолчанию работает "
+        "постоянно, раз в MAILING_ROLLUP_INTERVAL секунд"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Выполнить один проход и завершиться",
+        )
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Удалить сводки и пересчитать их по всем попыткам",
+        )
+
+    def handle(self, *args, **options):
+        self._stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: self._stop.set())
+        signal.signal(signal.SIGINT, lambda *_: self._stop.set())
+
+        if options["rebuild"]:
+            rebuild()
+            self.stdout.write("Сводки очищены, пересчитываем с первой попытки.")
+
+        while not self._stop.is_set():
+            result = roll_up()
+            if result["attempts"] or options["once"]:
+                self.stdout.write(
+                    f"Учтено попыток: {result['attempts']}, "
+                    f"сводки актуальны на {timezone.localtime(result['watermark']):%Y-%m-%d %H:%M:%S}."
+                )
+            if options["once"]:
+                break
+            self._stop.wait(settings.MAILING_ROLLUP_INTERVAL)
@@ -0,0 +1,49 @@
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from mailings.services import dispatch_due_mailings, finish_expired_mailings, next_wakeup
+
+
+class Command(BaseCommand):
+    help = (
+        "Планировщик рассылок: запускает рассылки в start_time (через очередь run_send_worker) "
+        "и завершает их в end_time"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Выполнить один проход и завершиться",
+        )
+
+    def handle(self, *args, **options):
+        self._stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: self._stop.set())
+        signal.signal(signal.SIGINT, lambda *_: self._stop.set())
+
+        while not self._stop.is_set():
+            now = timezone.now()
+            finished = finish_expired_mailings(now)
+            dispatched = dispatch_due_mailings(now)
+            if finished or dispatched:
+                self.stdout.write(
+                    f"{now:%Y-%m-%d %H:%M:%S}: запущено {dispatched}, завершено {finished}."
+                )
+            if options["once"]:
+                break
+            self._stop.wait(self._sleep_seconds())
+
+    def _sleep_seconds(self) -> float:
+        """Спим ровно до ближайшего события, но не дольше MAILING_SCHEDULER_MAX_SLEEP.
+
+        Верхняя граница нужна, чтобы заметить рассылки, созданные во время сна.
+        """
+        limit = settings.MAILING_SCHEDULER_MAX_SLEEP
+        wakeup = next_wakeup()
+        if wakeup is None:
+            return limit
+        return min(max((wakeup - timezone.now()).total_seconds(), 0), limit)
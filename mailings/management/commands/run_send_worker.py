@@ -0,0 +1,69 @@
+import os
+import signal
+import socket
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from mailings.services import claim_next_job, process_due_retries, run_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Воркер очереди отправки: забирает задания SendJob, отправляет рассылки "
+        "и повторяет письма, упавшие с временной ошибкой"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help="Количество потоков отправки внутри одного задания",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Разобрать текущую очередь и завершиться",
+        )
+
+    def handle(self, *args, **options):
+        worker = f"{socket.gethostname()}:{os.getpid()}"
+        self._stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        self.stdout.write(f"Воркер {worker} запущен.")
+        while not self._stopping:
+            retried = process_due_retries()
+            if retried["total"]:
+                self.stdout.write(
+                    f"Повторы: доставлено {retried['ok']} из {retried['total']}, ошибок {retried['failed']}."
+                )
+
+            job = claim_next_job(worker)
+            if job is None:
+                if options["once"] and not retried["total"]:
+                    break
+                if not retried["total"]:
+                    time.sleep(settings.MAILING_WORKER_POLL_INTERVAL)
+                continue
+
+            if job.reclaimed:
+                self.stdout.write(f"Задание #{job.pk} брошено упавшим воркером, докачиваем рассылку #{job.mailing_id}…")
+            else:
+                self.stdout.write(f"Задание #{job.pk}: рассылка #{job.mailing_id}…")
+            job = run_job(job, concurrency=options["concurrency"])
+            if job.status == job.Status.DONE:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Задание #{job.pk}: отправлено {job.ok} из {job.total}, ошибок {job.failed}."
+                ))
+            elif job.status == job.Status.SKIPPED:
+                self.stdout.write(f"Задание #{job.pk} пропущено: {job.error}.")
+            else:
+                self.stderr.write(f"Задание #{job.pk} завершилось с ошибкой:\n{job.error}")
+        self.stdout.write(f"Воркер {worker} остановлен.")
+
+    def _stop(self, signum, frame):
+        # Текущее задание доотправляется, новые не берутся.
+        self._stopping = True
@@ -0,0 +1,38 @@
+import asyncio
+
+from django.core.management.base import BaseCommand
+from mailings.sink import SMTPSink
+
+
+class Command(BaseCommand):
+    help = (
+        "Локальный SMTP-сервер-заглушка: принимает письма и никуда их не отправляет. "
+        "Для замеров укажите EMAIL_HOST=127.0.0.1, EMAIL_PORT=<порт>, EMAIL_USE_SSL=False."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=2525)
+        parser.add_argument("--latency", type=float, default=0, help="Задержка ответа сервера, мс")
+        parser.add_argument("--jitter", type=float, default=0, help="Случайная добавка к задержке, мс")
+        parser.add_argument("--temp-errors", type=float, default=0, help="Доля ответов 451, от 0 до 1")
+        parser.add_argument("--perm-errors", type=float, default=0, help="Доля ответов 550, от 0 до 1")
+        parser.add_argument("--disconnects", type=float, default=0, help="Доля обрывов соединения, от 0 до 1")
+
+    def handle(self, *args, **options):
+        sink = SMTPSink(
+            host=options["host"],
+            port=options["port"],
+            latency=options["latency"] / 1000,
+            jitter=options["jitter"] / 1000,
+            temp_error_rate=options["temp_errors"],
+            perm_error_rate=options["perm_errors"],
+            disconnect_rate=options["disconnects"],
+        )
+        self.stdout.write(f"SMTP-заглушка слушает {sink.host}:{sink.port}. Ctrl+C — остановить.")
+        try:
+            asyncio.run(sink.serve())
+        except KeyboardInterrupt:
+            pass
+        stats = ", ".join(f"{name} {value}" for name, value in sink.stats.items())
+        self.stdout.write(f"SMTP-заглушка остановлена: {stats}.")
@@ -1,6 +1,19 @@
+import asyncio
+import signal
+import sys
+
+from django.core.exceptions import ImproperlyConfigured
 from django.core.management.base import BaseCommand, CommandError
 from mailings.models import Mailing
-from mailings.services import send_mailing_now
+from mailings.services import (
+    MailingBusy, ShardsFailed, asend_mailing_now, check_async_backend, send_mailing_now, send_mailing_sharded,
+)
+from mailings.timing import RunTimings
+
+
+def _exit_on_sigterm(signum, frame):
+    # SystemExit раскручивает стек, и буфер попыток успевает сохраниться.
+    sys.exit(128 + signum)
 
 
 class Command(BaseCommand):
@@ -8,6 +21,28 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument("mailing_id", type=int)
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            help="Количество потоков отправки (по умолчанию 1 — последовательно); "
+                 "с --asyncio — число одновременных SMTP-сессий",
+        )
+        parser.add_argument(
+            "--asyncio",
+            action="store_true",
+            help="Отправлять через асинхронный движок на aiosmtplib",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=1,
+            help="Разделить получателей по pk на N диапазонов и отправлять их в N процессах",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Докачать прерванный запуск: пропустить получателей, которым письмо уже доставлено",
+        )
 
     def handle(self, *args, **options):
         mailing_id = options["mailing_id"]
@@ -15,8 +50,49 @@ class Command(BaseCommand):
             mailing = Mailing.objects.get(pk=mailing_id)
         except Mailing.DoesNotExist:
             raise CommandError(f"Рассылка #{mailing_id} не найдена")
+        concurrency = options["concurrency"]
+        if concurrency is not None and concurrency < 1:
+            raise CommandError("--concurrency должен быть не меньше 1")
+        processes = options["processes"]
+        if processes < 1:
+            raise CommandError("--processes должен быть не меньше 1")
+        if processes > 1 and options["asyncio"]:
+            raise CommandError("--processes нельзя сочетать с --asyncio")
+        if options["asyncio"]:
+            try:
+                check_async_backend()
+            except ImproperlyConfigured as e:
+                raise CommandError(str(e))
 
-        stats = send_mailing_now(mailing)
+        resume = options["resume"]
+        signal.signal(signal.SIGTERM, _exit_on_sigterm)
+        try:
+            if options["asyncio"]:
+                stats = asyncio.run(asend_mailing_now(mailing, concurrency=concurrency, resume=resume))
+            elif processes > 1:
+                stats = send_mailing_sharded(mailing, processes, concurrency=concurrency or 1, resume=resume)
+            else:
+                stats = send_mailing_now(mailing, concurrency=concurrency or 1, resume=resume)
+        except MailingBusy as e:
+            raise CommandError(str(e))
+        except ShardsFailed as e:
+            raise CommandError(
+                f"{e}. Отправлено {e.stats['ok']} из {e.stats['total']}, "
+                f"рассылка #{mailing.pk} осталась в статусе «Запущена», "
+                f"догрузите её с --resume."
+            )
         self.stdout.write(self.style.SUCCESS(
             f"Готово. Отправлено {stats['ok']} из {stats['total']}, ошибок {stats['failed']}."
         ))
+        self._write_timings(RunTimings.from_dict(mailing.run_timings))
+
+    def _write_timings(self, timings: RunTimings):
+        self.stdout.write(f"Замеры по фазам (запуск {timings.elapsed:.2f} с):")
+        header = f"  {'Фаза':<20}{'Вызовов':>9}{'Всего, с':>10}{'Сред., мс':>11}{'Макс., мс':>11}"
+        self.stdout.write(header + "".join(f"{label:>11}" for label in timings.bucket_labels))
+        for row in timings.rows():
+            self.stdout.write(
+                f"  {row['label']:<20}{row['count']:>9}{row['total']:>10.2f}"
+                f"{row['avg_ms']:>11.2f}{row['max_ms']:>11.2f}"
+                + "".join(f"{count:>11}" for count in row["buckets"])
+            )
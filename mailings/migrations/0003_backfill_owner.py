@@ -10,6 +10,10 @@ def set_owner(apps, schema_editor):
     Mailing = apps.get_model('mailings', 'Mailing')
     Client = apps.get_model('mailings', 'Client')
 
+    if not (Mailing.objects.filter(owner__isnull=True).exists() or Client.objects.filter(owner__isnull=True).exists()):
+        # заполнять нечего (например, новая или тестовая база)
+        return
+
     owner = User.objects.filter(is_superuser=True).first() or User.objects.first()
     if owner is None:
         # чтобы миграция не молча прошла, если нет ни одного юзера
@@ -0,0 +1,96 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:27
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mailings", "0008_alter_message_options"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SendJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("queued", "В очереди"),
+                            ("running", "Выполняется"),
+                            ("done", "Выполнено"),
+                            ("failed", "Ошибка"),
+                        ],
+                        default="queued",
+                        max_length=20,
+                        verbose_name="Статус",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        verbose_name="Поставлено в очередь",
+                    ),
+                ),
+                (
+                    "started_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Начало выполнения"
+                    ),
+                ),
+                (
+                    "finished_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Окончание выполнения"
+                    ),
+                ),
+                (
+                    "worker",
+                    models.CharField(blank=True, max_length=255, verbose_name="Воркер"),
+                ),
+                (
+                    "total",
+                    models.PositiveIntegerField(default=0, verbose_name="Всего писем"),
+                ),
+                ("ok", models.PositiveIntegerField(default=0, verbose_name="Успешно")),
+                (
+                    "failed",
+                    models.PositiveIntegerField(default=0, verbose_name="Не успешно"),
+                ),
+                ("error", models.TextField(blank=True, verbose_name="Ошибка")),
+                (
+                    "mailing",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="send_jobs",
+                        to="mailings.mailing",
+                        verbose_name="Рассылка",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "задание на отправку",
+                "verbose_name_plural": "задания на отправку",
+                "ordering": ["created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["status", "created_at"],
+                        name="sendjob_status_created_idx",
+                    )
+                ],
+            },
+        ),
+    ]
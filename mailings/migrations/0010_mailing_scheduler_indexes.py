@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mailings", "0009_sendjob"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="mailing",
+            index=models.Index(
+                condition=models.Q(("status", "created")),
+                fields=["start_time"],
+                name="mailing_due_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="mailing",
+            index=models.Index(
+                condition=models.Q(("status", "finished"), _negated=True),
+                fields=["end_time"],
+                name="mailing_expiry_idx",
+            ),
+        ),
+    ]
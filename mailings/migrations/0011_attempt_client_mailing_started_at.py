@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mailings", "0010_mailing_scheduler_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="attempt",
+            name="client",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="attempts",
+                to="mailings.client",
+                verbose_name="Получатель",
+            ),
+        ),
+        migrations.AddField(
+            model_name="mailing",
+            name="started_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="Начало последней отправки"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="attempt",
+            index=models.Index(
+                condition=models.Q(("status", "succeeded")),
+                fields=["mailing", "client", "date"],
+                name="attempt_delivered_idx",
+            ),
+        ),
+    ]
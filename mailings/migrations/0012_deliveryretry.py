@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mailings", "0011_attempt_client_mailing_started_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DeliveryRetry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "retries",
+                    models.PositiveSmallIntegerField(
+                        default=1, verbose_name="Номер повтора"
+                    ),
+                ),
+                (
+                    "next_try_at",
+                    models.DateTimeField(
+                        db_index=True, verbose_name="Следующая попытка"
+                    ),
+                ),
+                (
+                    "last_error",
+                    models.TextField(blank=True, verbose_name="Последняя ошибка"),
+                ),
+                (
+                    "client",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="retries",
+                        to="mailings.client",
+                        verbose_name="Получатель",
+                    ),
+                ),
+                (
+                    "mailing",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="retries",
+                        to="mailings.mailing",
+                        verbose_name="Рассылка",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "повторная отправка",
+                "verbose_name_plural": "повторные отправки",
+                "ordering": ["next_try_at"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("mailing", "client"), name="uniq_retry_mailing_client"
+                    )
+                ],
+            },
+        ),
+    ]
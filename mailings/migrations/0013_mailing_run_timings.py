@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mailings", "0012_deliveryretry"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mailing",
+            name="run_timings",
+            field=models.JSONField(
+                blank=True, default=dict, verbose_name="Замеры последней отправки"
+            ),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mailings", "0013_mailing_run_timings"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mailing",
+            name="lease_expires_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="Аренда отправки до"
+            ),
+        ),
+        migrations.AddField(
+            model_name="mailing",
+            name="lease_owner",
+            field=models.CharField(
+                blank=True, default="", max_length=255, verbose_name="Отправитель"
+            ),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:52
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    Mailing = apps.get_model("mailings", "Mailing")
+    Attempt = apps.get_model("mailings", "Attempt")
+
+    def count(queryset):
+        counted = queryset.filter(mailing=OuterRef("pk")).order_by().values("mailing").annotate(n=Count("*")).values("n")
+        return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+    Mailing.objects.update(
+        recipients_count=count(Mailing.clients.through.objects.all()),
+        succeeded_count=count(Attempt.objects.filter(status="succeeded")),
+        failed_count=count(Attempt.objects.filter(status="failed")),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mailings", "0014_mailing_lease"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mailing",
+            name="failed_count",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="Неуспешных попыток"
+            ),
+        ),
+        migrations.AddField(
+            model_name="mailing",
+            name="recipients_count",
+            field=models.PositiveIntegerField(default=0, verbose_name="Получателей"),
+        ),
+        migrations.AddField(
+            model_name="mailing",
+            name="succeeded_count",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="Успешных попыток"
+            ),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
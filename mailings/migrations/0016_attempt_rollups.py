@@ -0,0 +1,181 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mailings", "0015_mailing_counters"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyAttemptRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("bucket", models.DateTimeField(verbose_name="Начало периода")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("succeeded", "Успешно"), ("failed", "Не успешно")],
+                        max_length=20,
+                        verbose_name="Статус",
+                    ),
+                ),
+                (
+                    "count",
+                    models.PositiveIntegerField(default=0, verbose_name="Попыток"),
+                ),
+            ],
+            options={
+                "verbose_name": "сводка попыток за день",
+                "verbose_name_plural": "сводки попыток по дням",
+                "ordering": ["bucket"],
+                "abstract": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="HourlyAttemptRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("bucket", models.DateTimeField(verbose_name="Начало периода")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("succeeded", "Успешно"), ("failed", "Не успешно")],
+                        max_length=20,
+                        verbose_name="Статус",
+                    ),
+                ),
+                (
+                    "count",
+                    models.PositiveIntegerField(default=0, verbose_name="Попыток"),
+                ),
+            ],
+            options={
+                "verbose_name": "сводка попыток за час",
+                "verbose_name_plural": "сводки попыток по часам",
+                "ordering": ["bucket"],
+                "abstract": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="RollupWatermark",
+            fields=[
+                (
+                    "name",
+                    models.CharField(
+                        max_length=50,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="Сводка",
+                    ),
+                ),
+                ("value", models.DateTimeField(verbose_name="Учтены попытки до")),
+            ],
+            options={
+                "verbose_name": "отметка сводки",
+                "verbose_name_plural": "отметки сводок",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="attempt",
+            index=models.Index(fields=["date"], name="attempt_date_idx"),
+        ),
+        migrations.AddField(
+            model_name="dailyattemptrollup",
+            name="mailing",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to="mailings.mailing",
+                verbose_name="Рассылка",
+            ),
+        ),
+        migrations.AddField(
+            model_name="dailyattemptrollup",
+            name="owner",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="Владелец",
+            ),
+        ),
+        migrations.AddField(
+            model_name="hourlyattemptrollup",
+            name="mailing",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to="mailings.mailing",
+                verbose_name="Рассылка",
+            ),
+        ),
+        migrations.AddField(
+            model_name="hourlyattemptrollup",
+            name="owner",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="Владелец",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="dailyattemptrollup",
+            index=models.Index(
+                fields=["owner", "bucket"], name="daily_rollup_owner_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="dailyattemptrollup",
+            index=models.Index(
+                fields=["mailing", "bucket"], name="daily_rollup_mailing_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="dailyattemptrollup",
+            constraint=models.UniqueConstraint(
+                fields=("bucket", "mailing", "status"), name="uniq_daily_rollup"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="hourlyattemptrollup",
+            index=models.Index(
+                fields=["owner", "bucket"], name="hourly_rollup_owner_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="hourlyattemptrollup",
+            index=models.Index(
+                fields=["mailing", "bucket"], name="hourly_rollup_mailing_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="hourlyattemptrollup",
+            constraint=models.UniqueConstraint(
+                fields=("bucket", "mailing", "status"), name="uniq_hourly_rollup"
+            ),
+        ),
+    ]
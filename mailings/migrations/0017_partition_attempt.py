@@ -0,0 +1,91 @@
+import re
+from datetime import date, datetime, timezone
+
+from django.conf import settings
+from django.db import migrations
+
+TABLE = "mailings_attempt"
+OLD_TABLE = "mailings_attempt_unpartitioned"
+
+
+def _add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _bound(month):
+    return datetime(month.year, month.month, 1, tzinfo=timezone.utc).isoformat()
+
+
+def partition_attempts(apps, schema_editor):
+    """Переводит таблицу попыток на помесячные секции по `date`.
+
+    Только для PostgreSQL. Старая таблица переименовывается, вместо неё
+    создаётся секционированная с теми же колонками, индексами, внешними
+    ключами и последовательностью id; данные копируются одним
+    `INSERT ... SELECT`. Первичный ключ секционированной таблицы —
+    `(id, date)`: ключ секционирования обязан в него входить. Для Django
+    первичным ключом остаётся `id`, значения по-прежнему уникальны.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    qn = schema_editor.connection.ops.quote_name
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {qn(TABLE)} RENAME TO {qn(OLD_TABLE)}")
+        cursor.execute(
+            f"CREATE TABLE {qn(TABLE)} (LIKE {qn(OLD_TABLE)} INCLUDING DEFAULTS) PARTITION BY RANGE (date)"
+        )
+
+        cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes "
+            "WHERE schemaname = current_schema() AND tablename = %s "
+            "AND indexname NOT IN (SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p')",
+            [OLD_TABLE, OLD_TABLE],
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype IN ('f', 'c')",
+            [OLD_TABLE],
+        )
+        constraints = cursor.fetchall()
+
+        cursor.execute(f"SELECT min(date), COALESCE(max(id), 0) FROM {qn(OLD_TABLE)}")
+        first, max_id = cursor.fetchone()
+        this_month = datetime.now(timezone.utc).date().replace(day=1)
+        month = date(first.year, first.month, 1) if first else this_month
+        last = _add_months(this_month, settings.MAILING_ATTEMPT_PARTITIONS_AHEAD)
+        while month <= last:
+            cursor.execute(
+                f"CREATE TABLE {qn(f'{TABLE}_p{month:%Y%m}')} PARTITION OF {qn(TABLE)} "
+                f"FOR VALUES FROM ('{_bound(month)}') TO ('{_bound(_add_months(month, 1))}')"
+            )
+            month = _add_months(month, 1)
+        cursor.execute(f"CREATE TABLE {qn(f'{TABLE}_default')} PARTITION OF {qn(TABLE)} DEFAULT")
+
+        cursor.execute(f"INSERT INTO {qn(TABLE)} SELECT * FROM {qn(OLD_TABLE)}")
+        # Вместе со старой таблицей удаляются её индексы, ограничения и identity-последовательность,
+        # и их имена освобождаются для новой таблицы.
+        cursor.execute(f"DROP TABLE {qn(OLD_TABLE)}")
+
+        cursor.execute(f"ALTER TABLE {qn(TABLE)} ADD CONSTRAINT {qn(f'{TABLE}_pkey')} PRIMARY KEY (id, date)")
+        old_table_re = re.compile(rf" ON (?:\S+\.)?{OLD_TABLE} ")
+        for _, definition in indexes:
+            cursor.execute(old_table_re.sub(f" ON {qn(TABLE)} ", definition, count=1))
+        for name, definition in constraints:
+            cursor.execute(f"ALTER TABLE {qn(TABLE)} ADD CONSTRAINT {qn(name)} {definition}")
+
+        sequence = f"{TABLE}_id_seq"
+        cursor.execute(f"CREATE SEQUENCE {qn(sequence)} START WITH {max_id + 1} OWNED BY {qn(TABLE)}.id")
+        cursor.execute(f"ALTER TABLE {qn(TABLE)} ALTER COLUMN id SET DEFAULT nextval('{sequence}'::regclass)")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mailings", "0016_attempt_rollups"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_attempts, migrations.RunPython.noop),
+    ]
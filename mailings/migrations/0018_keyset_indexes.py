@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mailings", "0017_partition_attempt"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="attempt",
+            index=models.Index(fields=["-date", "id"], name="attempt_keyset_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="attempt",
+            index=models.Index(
+                fields=["mailing", "-date", "id"], name="attempt_mailing_keyset_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="client",
+            index=models.Index(fields=["full_name", "id"], name="client_keyset_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="client",
+            index=models.Index(
+                fields=["owner", "full_name", "id"], name="client_owner_keyset_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="mailing",
+            index=models.Index(fields=["start_time", "id"], name="mailing_keyset_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="mailing",
+            index=models.Index(
+                fields=["owner", "start_time", "id"], name="mailing_owner_keyset_idx"
+            ),
+        ),
+    ]
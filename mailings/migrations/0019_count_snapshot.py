@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mailings", "0018_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CountSnapshot",
+            fields=[
+                (
+                    "name",
+                    models.CharField(
+                        max_length=50,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="Показатель",
+                    ),
+                ),
+                ("value", models.PositiveBigIntegerField(verbose_name="Значение")),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="Посчитано"),
+                ),
+            ],
+            options={
+                "verbose_name": "сохранённый подсчёт",
+                "verbose_name_plural": "сохранённые подсчёты",
+            },
+        ),
+    ]
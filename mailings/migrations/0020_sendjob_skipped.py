@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mailings", "0019_count_snapshot"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="sendjob",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("queued", "В очереди"),
+                    ("running", "Выполняется"),
+                    ("done", "Выполнено"),
+                    ("failed", "Ошибка"),
+                    ("skipped", "Пропущено"),
+                ],
+                default="queued",
+                max_length=20,
+                verbose_name="Статус",
+            ),
+        ),
+    ]
@@ -0,0 +1,55 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def set_owner(apps, schema_editor):
+    app_label, model_name = settings.AUTH_USER_MODEL.split('.')
+    User = apps.get_model(app_label, model_name)
+    Message = apps.get_model('mailings', 'Message')
+    Mailing = apps.get_model('mailings', 'Mailing')
+
+    messages = Message.objects.filter(owner__isnull=True)
+    if not messages.exists():
+        return
+    # письмо достаётся владельцу рассылки, в которой оно используется
+    for message_id, owner_id in Mailing.objects.order_by('pk').values_list('message_id', 'owner_id'):
+        Message.objects.filter(pk=message_id, owner__isnull=True).update(owner_id=owner_id)
+
+    owner = User.objects.filter(is_superuser=True).first() or User.objects.first()
+    if owner is None:
+        raise RuntimeError(
+            "В базе нет пользователей. Создай хотя бы одного (createsuperuser) и повтори migrate."
+        )
+    messages.update(owner=owner)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("mailings", "0020_sendjob_skipped"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="message",
+            name="owner",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="messages",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.RunPython(set_owner, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="message",
+            name="owner",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="messages",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+    ]
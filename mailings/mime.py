@@ -0,0 +1,187 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from email.message import Message
+from email.utils import formatdate
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.core.mail.message import RFC5322_EMAIL_LINE_LENGTH_LIMIT, forbid_multi_line_headers, make_msgid
+from django.core.mail.utils import DNS_NAME
+
+from .templating import CompiledTemplate, template_context
+
+# Заголовки, которые у каждого письма свои. Всё остальное кодируется один раз.
+RECIPIENT_HEADERS = ("To", "Date", "Message-ID")
+
+# Метка на месте подстановки в теле: переживает кодирование 8bit без изменений.
+_MARK = "\x00{}\x00"
+
+# Сколько подготовленных писем держать в кэше процесса.
+CACHE_SIZE = 32
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class PreparedMessage:
+    """Письмо рассылки, подготовленное один раз на весь запуск.
+
+    Тема и текст разбираются в шаблоны (`CompiledTemplate`), а общая часть
+    письма — кодирование заголовков, выбор кодировки и сериализация
+    длинного тела — выполняется один раз. Для каждого получателя заново
+    формируются только заголовки `To`, `Date`, `Message-ID` (и `Subject`,
+    если в теме есть подстановки), а в тело между готовыми байтами
+    вставляются значения подстановок.
+
+    Если после кодирования тело нельзя разрезать по подстановкам
+    (quoted-printable или base64), письма с персональным текстом
+    собираются целиком, но шаблоны всё равно разбираются один раз.
+    """
+
+    def __init__(self, subject: str, body: str, from_email: str = None):
+        self.subject = CompiledTemplate(subject)
+        self.body = CompiledTemplate(body)
+        marks = {field: _MARK.format(i) for i, field in enumerate(self.body.fields)}
+        self.template = EmailMessage(
+            subject=subject if self.subject.is_static else "",
+            body=self.body.render(marks) if marks else body,
+            from_email=from_email,
+        )
+        self.encoding = self.template.encoding or settings.DEFAULT_CHARSET
+        self.mime = self.template.message()
+        for name in RECIPIENT_HEADERS:
+            del self.mime[name]
+        if not self.subject.is_static:
+            del self.mime["Subject"]
+        if self.body.fields and self.mime["Content-Transfer-Encoding"] == "7bit":
+            # Текст из ASCII, но подставленные значения могут быть и не ASCII.
+            self.mime.replace_header("Content-Transfer-Encoding", "8bit")
+        self._chunks = {}
+
+    @classmethod
+    def for_mailing(cls, mailing) -> "PreparedMessage":
+        """Подготовленное письмо рассылки из кэша процесса.
+
+        Ключ кэша — pk сообщения и хэш его темы и текста, так что
+        отредактированное сообщение подготавливается заново.
+        """
+        message = mailing.message
+        digest = hashlib.sha1(f"{message.topic}\x00{message.body}".encode()).hexdigest()
+        key = (message.pk, digest)
+        with _cache_lock:
+            if key in _cache:
+                _cache.move_to_end(key)
+                return _cache[key]
+        prepared = cls(message.topic, message.body)
+        with _cache_lock:
+            _cache[key] = prepared
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+        return prepared
+
+    def chunks(self, linesep: str):
+        """Общая часть письма в байтах, разрезанная по подстановкам тела.
+
+        Возвращает список из `len(body.fields) + 1` кусков или None,
+        если кодирование тела не позволяет вставлять значения в готовые байты.
+        """
+        if linesep not in self._chunks:
+            data = self.mime.as_bytes(linesep=linesep)
+            chunks = [data]
+            if self.body.fields:
+                if self.mime["Content-Transfer-Encoding"] != "8bit":
+                    chunks = None
+                else:
+                    chunks = re.split(rb"\x00\d+\x00", data)
+                    if len(chunks) != len(self.body.fields) + 1:
+                        chunks = None
+            self._chunks[linesep] = chunks
+        return self._chunks[linesep]
+
+    def to(self, recipient) -> "RecipientEmail":
+        """Письмо для одного получателя (`Client` или строки `recipient_rows`)."""
+        return RecipientEmail(self, recipient)
+
+
+class RecipientEmail(EmailMessage):
+    """`EmailMessage` одного получателя поверх `PreparedMessage`.
+
+    Почтовые бэкенды Django и асинхронный пул работают с ним как с обычным
+    письмом: конверт берётся из `to`, а `message()` отдаёт готовые байты.
+    """
+
+    def __init__(self, prepared: PreparedMessage, recipient):
+        self.prepared = prepared
+        self.context = template_context(recipient)
+        super().__init__(
+            subject=prepared.subject.render(self.context),
+            body=prepared.body.render(self.context),
+            from_email=prepared.template.from_email,
+            to=[recipient.email],
+        )
+
+    def message(self):
+        if self.prepared.body.fields and self.prepared.chunks("\n") is None:
+            return super().message()
+        headers = Message()
+        values = [
+            ("To", ", ".join(str(address) for address in self.to)),
+            ("Date", formatdate(localtime=settings.EMAIL_USE_LOCALTIME)),
+            ("Message-ID", make_msgid(domain=DNS_NAME)),
+        ]
+        if not self.prepared.subject.is_static:
+            values.append(("Subject", self.subject))
+        for name, value in values:
+            headers[name] = forbid_multi_line_headers(name, value, self.prepared.encoding)[1]
+        return RecipientMIME(self, headers)
+
+
+class RecipientMIME:
+    """MIME-сообщение получателя: свои заголовки плюс общая закодированная часть.
+
+    `as_bytes` склеивает готовые байты без повторной сериализации. Любые
+    другие обращения получают полноценный `email.message.Message`.
+    """
+
+    def __init__(self, email: RecipientEmail, headers: Message):
+        self.email = email
+        self.headers = headers
+        self._full = None
+
+    def as_bytes(self, unixfrom: bool = False, linesep: str = "\n") -> bytes:
+        chunks = self.email.prepared.chunks(linesep)
+        if unixfrom or chunks is None:
+            return self.full().as_bytes(unixfrom, linesep)
+        policy = self.headers.policy.clone(linesep=linesep)
+        # Заголовки получателя без пустой строки, отделяющей тело.
+        parts = [self.headers.as_bytes(policy=policy)[:-len(linesep)], chunks[0]]
+        if len(chunks) == 1:
+            return b"".join(parts)
+        for field, chunk in zip(self.email.prepared.body.fields, chunks[1:]):
+            parts.append(self.email.context[field].encode(self.email.prepared.encoding))
+            parts.append(chunk)
+        data = b"".join(parts)
+        # Длинная строка после подстановки требует другого кодирования тела.
+        if any(len(line) > RFC5322_EMAIL_LINE_LENGTH_LIMIT for line in data.split(linesep.encode())):
+            return self.full().as_bytes(unixfrom, linesep)
+        return data
+
+    def full(self):
+        """Полное сообщение, собранное штатно, для редких обращений помимо `as_bytes`."""
+        if self._full is None:
+            self._full = EmailMessage.message(self.email)
+            # Дата и идентификатор должны совпадать с уже выданными в `as_bytes`.
+            for name in ("Date", "Message-ID"):
+                del self._full[name]
+                self._full[name] = self.headers[name]
+        return self._full
+
+    def __getitem__(self, name):
+        return self.full()[name]
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.full(), name)
@@ -32,6 +32,11 @@ class Client(models.Model):
         constraints = [
             models.UniqueConstraint(fields=['owner', 'email'], name='uniq_owner_email'),
         ]
+        indexes = [
+            # Для постраничного списка по ключу `(full_name, id)`.
+            models.Index(fields=['full_name', 'id'], name='client_keyset_idx'),
+            models.Index(fields=['owner', 'full_name', 'id'], name='client_owner_keyset_idx'),
+        ]
         permissions = [
             ("view_all_clients", "Может просматривать всех клиентов"),
         ]
@@ -83,6 +88,30 @@ class Mailing(models.Model):
     )
     start_time = models.DateTimeField(verbose_name='Время запуска')
     end_time = models.DateTimeField(verbose_name='Время окончания')
+    started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Начало последней отправки',
+    )
+    run_timings = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name='Замеры последней отправки',
+    )
+    recipients_count = models.PositiveIntegerField(default=0, verbose_name='Получателей')
+    succeeded_count = models.PositiveIntegerField(default=0, verbose_name='Успешных попыток')
+    failed_count = models.PositiveIntegerField(default=0, verbose_name='Неуспешных попыток')
+    lease_owner = models.CharField(
+        max_length=255,
+        blank=True,
+        default='',
+        verbose_name='Отправитель',
+    )
+    lease_expires_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Аренда отправки до',
+    )
     message = models.ForeignKey(
         Message,
         on_delete=models.CASCADE,
@@ -112,6 +141,23 @@ class Mailing(models.Model):
         permissions = [
             ("view_all_mailings", "Может просматривать все рассылки"),
         ]
+        indexes = [
+            # Частичные индексы планировщика: в них попадают только ещё не
+            # завершённые рассылки, поэтому размер не растёт с историей.
+            models.Index(
+                fields=['start_time'],
+                condition=models.Q(status='created'),
+                name='mailing_due_idx',
+            ),
+            models.Index(
+                fields=['end_time'],
+                condition=~models.Q(status='finished'),
+                name='mailing_expiry_idx',
+            ),
+            # Для постраничного списка по ключу `(start_time, id)`.
+            models.Index(fields=['start_time', 'id'], name='mailing_keyset_idx'),
+            models.Index(fields=['owner', 'start_time', 'id'], name='mailing_owner_keyset_idx'),
+        ]
 
 
 class Attempt(models.Model):
@@ -119,6 +165,9 @@ class Attempt(models.Model):
 
     Фиксирует время отправки, статус (успех/ошибка)
     и ответ почтового сервера.
+
+    В PostgreSQL таблица секционирована по месяцам `date`
+    (миграция 0017, `mailings/partitions.py`).
     """
     class Status(models.TextChoices):
         SUCCEEDED = 'succeeded', 'Успешно'
@@ -138,6 +187,15 @@ class Attempt(models.Model):
         verbose_name='Рассылка',
         related_name='attempts'
     )
+    client = models.ForeignKey(
+        Client,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name='Получатель',
+        related_name='attempts',
+        db_index=True,
+    )
 
     def __str__(self):
         return f'{self.get_status_display()} — {self.date:%Y-%m-%d %H:%M}'
@@ -152,3 +210,192 @@ class Attempt(models.Model):
         permissions = [
             ("view_all_attempts", "Может просматривать все попытки"),
         ]
+        indexes = [
+            # Для докачки: кому из получателей рассылки письмо уже доставлено.
+            models.Index(
+                fields=['mailing', 'client', 'date'],
+                condition=models.Q(status='succeeded'),
+                name='attempt_delivered_idx',
+            ),
+            # Для инкрементальной агрегации в сводки (`rollup_attempts`).
+            models.Index(fields=['date'], name='attempt_date_idx'),
+            # Для постраничного списка по ключу `(-date, id)`, в том числе по одной рассылке.
+            models.Index(fields=['-date', 'id'], name='attempt_keyset_idx'),
+            models.Index(fields=['mailing', '-date', 'id'], name='attempt_mailing_keyset_idx'),
+        ]
+
+
+class SendJob(models.Model):
+    """Задание на отправку рассылки.
+
+    Очередь заданий хранится в БД: веб-интерфейс только ставит задание,
+    а отправку выполняет воркер `run_send_worker`. Задания забираются
+    через `SELECT ... FOR UPDATE SKIP LOCKED`, поэтому несколько воркеров
+    могут разбирать одну очередь, не мешая друг другу.
+    """
+    class Status(models.TextChoices):
+        QUEUED = 'queued', 'В очереди'
+        RUNNING = 'running', 'Выполняется'
+        DONE = 'done', 'Выполнено'
+        FAILED = 'failed', 'Ошибка'
+        SKIPPED = 'skipped', 'Пропущено'
+
+    # Задания, которые ещё отправят рассылку: второе такое же для неё не создаётся.
+    ACTIVE_STATUSES = (Status.QUEUED, Status.RUNNING)
+
+    mailing = models.ForeignKey(
+        Mailing,
+        on_delete=models.CASCADE,
+        verbose_name='Рассылка',
+        related_name='send_jobs'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.QUEUED,
+        verbose_name='Статус',
+    )
+    created_at = models.DateTimeField(default=timezone.now, verbose_name='Поставлено в очередь')
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name='Начало выполнения')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Окончание выполнения')
+    worker = models.CharField(max_length=255, blank=True, verbose_name='Воркер')
+    total = models.PositiveIntegerField(default=0, verbose_name='Всего писем')
+    ok = models.PositiveIntegerField(default=0, verbose_name='Успешно')
+    failed = models.PositiveIntegerField(default=0, verbose_name='Не успешно')
+    error = models.TextField(blank=True, verbose_name='Ошибка')
+
+    def __str__(self):
+        return f'Задание #{self.pk} ({self.get_status_display()})'
+
+    class Meta:
+        verbose_name = 'задание на отправку'
+        verbose_name_plural = 'задания на отправку'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='sendjob_status_created_idx'),
+        ]
+
+
+class DeliveryRetry(models.Model):
+    """Отложенная повторная отправка письма получателю.
+
+    Создаётся, когда отправка завершилась временной ошибкой (ответ 4xx,
+    обрыв соединения, таймаут). Повтор выполняется не раньше
+    `next_try_at`; интервал растёт экспоненциально со случайным разбросом.
+    """
+    mailing = models.ForeignKey(
+        Mailing,
+        on_delete=models.CASCADE,
+        verbose_name='Рассылка',
+        related_name='retries'
+    )
+    client = models.ForeignKey(
+        Client,
+        on_delete=models.CASCADE,
+        verbose_name='Получатель',
+        related_name='retries'
+    )
+    retries = models.PositiveSmallIntegerField(default=1, verbose_name='Номер повтора')
+    next_try_at = models.DateTimeField(db_index=True, verbose_name='Следующая попытка')
+    last_error = models.TextField(blank=True, verbose_name='Последняя ошибка')
+
+    def __str__(self):
+        return f'Повтор #{self.retries} для {self.client_id} в {self.next_try_at:%Y-%m-%d %H:%M}'
+
+    class Meta:
+        verbose_name = 'повторная отправка'
+        verbose_name_plural = 'повторные отправки'
+        ordering = ['next_try_at']
+        constraints = [
+            models.UniqueConstraint(fields=['mailing', 'client'], name='uniq_retry_mailing_client'),
+        ]
+
+
+class AttemptRollup(models.Model):
+    """Сводка попыток за период: сколько попыток рассылки с данным статусом.
+
+    Заполняется командой `rollup_attempts` из новых записей `Attempt`,
+    страница статистики читает только сводки. Владелец хранится
+    денормализованно, чтобы выборка по пользователю шла по индексу
+    без JOIN с рассылками.
+    """
+    bucket = models.DateTimeField(verbose_name='Начало периода')
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Владелец',
+    )
+    mailing = models.ForeignKey(
+        Mailing,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Рассылка',
+    )
+    status = models.CharField(max_length=20, choices=Attempt.Status.choices, verbose_name='Статус')
+    count = models.PositiveIntegerField(default=0, verbose_name='Попыток')
+
+    class Meta:
+        abstract = True
+        ordering = ['bucket']
+
+
+class HourlyAttemptRollup(AttemptRollup):
+    """Сводка попыток по часам."""
+
+    class Meta(AttemptRollup.Meta):
+        verbose_name = 'сводка попыток за час'
+        verbose_name_plural = 'сводки попыток по часам'
+        constraints = [
+            models.UniqueConstraint(fields=['bucket', 'mailing', 'status'], name='uniq_hourly_rollup'),
+        ]
+        indexes = [
+            models.Index(fields=['owner', 'bucket'], name='hourly_rollup_owner_idx'),
+            models.Index(fields=['mailing', 'bucket'], name='hourly_rollup_mailing_idx'),
+        ]
+
+
+class DailyAttemptRollup(AttemptRollup):
+    """Сводка попыток по дням (начало суток — в часовом поясе `TIME_ZONE`)."""
+
+    class Meta(AttemptRollup.Meta):
+        verbose_name = 'сводка попыток за день'
+        verbose_name_plural = 'сводки попыток по дням'
+        constraints = [
+            models.UniqueConstraint(fields=['bucket', 'mailing', 'status'], name='uniq_daily_rollup'),
+        ]
+        indexes = [
+            models.Index(fields=['owner', 'bucket'], name='daily_rollup_owner_idx'),
+            models.Index(fields=['mailing', 'bucket'], name='daily_rollup_mailing_idx'),
+        ]
+
+
+class RollupWatermark(models.Model):
+    """Отметка, до которой попытки уже учтены в сводках."""
+    name = models.CharField(max_length=50, primary_key=True, verbose_name='Сводка')
+    value = models.DateTimeField(verbose_name='Учтены попытки до')
+
+    def __str__(self):
+        return f'{self.name}: {self.value:%Y-%m-%d %H:%M:%S}'
+
+    class Meta:
+        verbose_name = 'отметка сводки'
+        verbose_name_plural = 'отметки сводок'
+
+
+class CountSnapshot(models.Model):
+    """Сохранённое значение дорогого подсчёта (например, числа уникальных адресов).
+
+    Обновляется командой `refresh_counts` вне запросов пользователей;
+    страницы читают готовое число вместо полного прохода по таблице.
+    """
+    name = models.CharField(max_length=50, primary_key=True, verbose_name='Показатель')
+    value = models.PositiveBigIntegerField(verbose_name='Значение')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Посчитано')
+
+    def __str__(self):
+        return f'{self.name}: {self.value}'
+
+    class Meta:
+        verbose_name = 'сохранённый подсчёт'
+        verbose_name_plural = 'сохранённые подсчёты'
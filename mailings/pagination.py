@@ -0,0 +1,130 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import Http404
+
+from .estimates import estimate_count
+
+
+def _encode(values: list) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+def _decode(cursor: str) -> list:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode()))
+
+
+class KeysetPage:
+    """Страница списка при пагинации по ключу.
+
+    Вместо номера страницы хранит курсоры — значения ключа сортировки
+    первой и последней строки. `next_query`/`previous_query` — строка
+    запроса для ссылок «Вперёд»/«Назад» с сохранением остальных параметров.
+    """
+
+    def __init__(self, object_list: list, has_next: bool, has_previous: bool, next_query: str, previous_query: str):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_query = next_query
+        self.previous_query = previous_query
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginationMixin:
+    """Пагинация списка по ключу сортировки (keyset, «курсорная»).
+
+    Следующая страница выбирается не через `OFFSET`, а условием «строки
+    после последней показанной» по полям `keyset` (например, `-date, id`),
+    поэтому с составным индексом по тем же полям каждая страница стоит
+    одинаково на любой глубине. Последнее поле ключа должно быть уникальным.
+
+    Страница берётся из параметров `?after=<курсор>` или `?before=<курсор>`;
+    в контекст попадают `page_obj` (`KeysetPage`), `is_paginated` и `total_count` —
+    число строк списка, для больших списков оценка планировщика (`estimate_count`).
+    Общего числа страниц нет — точный подсчёт стоил бы полного прохода.
+    """
+    paginate_by = 50
+    keyset = ("id",)
+
+    def _fields(self, reverse: bool = False) -> list:
+        """Пары (поле, по убыванию ли) с учётом направления обхода."""
+        return [(name.lstrip("-"), name.startswith("-") != reverse) for name in self.keyset]
+
+    def _cursor(self, obj) -> str:
+        values = [getattr(obj, name) for name, _ in self._fields()]
+        return _encode([value.isoformat() if hasattr(value, "isoformat") else value for value in values])
+
+    def _parse_cursor(self, cursor: str) -> list:
+        try:
+            values = _decode(cursor)
+            fields = self._fields()
+            if not isinstance(values, list) or len(values) != len(fields):
+                raise ValueError
+            return [
+                self.model._meta.get_field(name).to_python(value) for (name, _), value in zip(fields, values)
+            ]
+        except (ValueError, TypeError, binascii.Error, ValidationError) as e:
+            raise Http404("Неверный курсор страницы") from e
+
+    def _seek(self, values: list, reverse: bool = False) -> Q:
+        """Условие «строго после `values`» в порядке ключа.
+
+        Первое поле дополнительно ограничено нестрогим неравенством,
+        чтобы БД могла начать обход индекса сразу с нужного места.
+        """
+        fields = self._fields(reverse)
+        (first, first_desc), first_value = fields[0], values[0]
+        condition = Q(**{f"{first}__{'lte' if first_desc else 'gte'}": first_value})
+        after = Q()
+        for i, ((name, desc), value) in enumerate(zip(fields, values)):
+            step = Q(**{f"{name}__{'lt' if desc else 'gt'}": value})
+            for (prev_name, _), prev_value in zip(fields[:i], values[:i]):
+                step &= Q(**{prev_name: prev_value})
+            after |= step
+        return condition & after
+
+    def _query(self, **params) -> str:
+        query = self.request.GET.copy()
+        for key in ("after", "before"):
+            query.pop(key, None)
+        query.update(params)
+        return query.urlencode()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["total_count"] = estimate_count(self.object_list)
+        return context
+
+    def paginate_queryset(self, queryset, page_size):
+        after, before = self.request.GET.get("after"), self.request.GET.get("before")
+        if before:
+            values = self._parse_cursor(before)
+            reverse_order = [name[1:] if name.startswith("-") else f"-{name}" for name in self.keyset]
+            rows = list(queryset.order_by(*reverse_order).filter(self._seek(values, reverse=True))[:page_size + 1])
+            has_previous, has_next = len(rows) > page_size, True
+            rows = rows[:page_size][::-1]
+        else:
+            queryset = queryset.order_by(*self.keyset)
+            if after:
+                queryset = queryset.filter(self._seek(self._parse_cursor(after)))
+            rows = list(queryset[:page_size + 1])
+            has_next, has_previous = len(rows) > page_size, bool(after)
+            rows = rows[:page_size]
+        page = KeysetPage(
+            rows,
+            has_next=has_next and bool(rows),
+            has_previous=has_previous and bool(rows),
+            next_query=self._query(after=self._cursor(rows[-1])) if rows else "",
+            previous_query=self._query(before=self._cursor(rows[0])) if rows else "",
+        )
+        return None, page, rows, page.has_next or page.has_previous
@@ -0,0 +1,87 @@
+import re
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.db import connection
+
+from .models import Attempt
+
+# Таблица попыток в PostgreSQL секционирована по `date` (`PARTITION BY RANGE`),
+# по секции на календарный месяц в UTC: `mailings_attempt_p202610` хранит попытки
+# с 2026-10-01 00:00 UTC до 2026-11-01 00:00 UTC. Строки, для которых секции нет,
+# попадают в `mailings_attempt_default`.
+TABLE = Attempt._meta.db_table
+DEFAULT_PARTITION = f"{TABLE}_default"
+_PARTITION_RE = re.compile(rf"^{TABLE}_p(\d{{4}})(\d{{2}})$")
+
+
+def month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{TABLE}_p{month:%Y%m}"
+
+
+def partition_end(month: date) -> datetime:
+    """Верхняя (не включаемая) граница секции месяца `month`."""
+    month = add_months(month, 1)
+    return datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+
+
+def _bound(month: date) -> str:
+    return datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc).isoformat()
+
+
+def is_partitioned() -> bool:
+    """Секционирована ли таблица попыток (False и на других СУБД)."""
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass", [TABLE])
+        return cursor.fetchone() is not None
+
+
+def monthly_partitions() -> dict:
+    """Помесячные секции таблицы попыток: месяц → имя таблицы."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = %s::regclass",
+            [TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    partitions = {}
+    for name in names:
+        match = _PARTITION_RE.match(name)
+        if match:
+            partitions[date(int(match[1]), int(match[2]), 1)] = name
+    return partitions
+
+
+def create_partition(month: date):
+    """Создаёт секцию за месяц `month`, если её ещё нет.
+
+    Если за этот месяц уже есть строки в секции по умолчанию, PostgreSQL
+    откажет: их нужно сначала перенести.
+    """
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {qn(partition_name(month))} PARTITION OF {qn(TABLE)} "
+            f"FOR VALUES FROM ('{_bound(month)}') TO ('{_bound(add_months(month, 1))}')"
+        )
+
+
+def remove_partition(name: str, detach: bool = False):
+    """Удаляет секцию или, при `detach=True`, отсоединяет её в отдельную таблицу."""
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        if detach:
+            cursor.execute(f"ALTER TABLE {qn(TABLE)} DETACH PARTITION {qn(name)}")
+        else:
+            cursor.execute(f"DROP TABLE {qn(name)}")
@@ -0,0 +1,76 @@
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Счётчики прогресса, которые увеличиваются по ходу запуска.
+COUNTERS = ("sent", "ok", "failed")
+
+
+def _key(mailing_id: int, field: str) -> str:
+    return f"mailings:progress:{mailing_id}:{field}"
+
+
+def start_progress(mailing, total: int = None, reset: bool = True):
+    """Отмечает в кэше начало запуска рассылки.
+
+    Новый запуск обнуляет счётчики и запоминает `total` — сколько писем
+    предстоит отправить. При докачке (`reset=False`) счётчики продолжают
+    расти с прежних значений.
+    """
+    values = {
+        _key(mailing.pk, "status"): mailing.Status.RUNNING,
+        _key(mailing.pk, "owner"): mailing.owner_id,
+    }
+    if reset:
+        values[_key(mailing.pk, "total")] = total
+        values.update({_key(mailing.pk, field): 0 for field in COUNTERS})
+    try:
+        cache.set_many(values, timeout=settings.MAILING_PROGRESS_TTL)
+    except Exception:
+        # Прогресс — вспомогательная информация: без Redis отправка продолжается.
+        logger.warning("Не удалось записать прогресс рассылки #%s", mailing.pk, exc_info=True)
+
+
+def add_progress(mailing_id: int, ok: int = 0, failed: int = 0):
+    """Атомарно увеличивает счётчики прогресса (`INCRBY` в Redis)."""
+    try:
+        for field, delta in (("sent", ok + failed), ("ok", ok), ("failed", failed)):
+            if not delta:
+                continue
+            key = _key(mailing_id, field)
+            try:
+                cache.incr(key, delta)
+            except ValueError:
+                # Ключ истёк или запуск начался без него.
+                cache.add(key, 0, timeout=settings.MAILING_PROGRESS_TTL)
+                cache.incr(key, delta)
+    except Exception:
+        logger.warning("Не удалось обновить прогресс рассылки #%s", mailing_id, exc_info=True)
+
+
+def finish_progress(mailing):
+    """Отмечает в кэше, что запуск рассылки завершён."""
+    try:
+        cache.set(_key(mailing.pk, "status"), mailing.Status.FINISHED, timeout=settings.MAILING_PROGRESS_TTL)
+    except Exception:
+        logger.warning("Не удалось записать прогресс рассылки #%s", mailing.pk, exc_info=True)
+
+
+def get_progress(mailing_id: int):
+    """Читает прогресс рассылки из кэша одним запросом, без обращения к БД.
+
+    Возвращает:
+        dict | None: status, owner, total, sent, ok, failed или None,
+        если запусков не было или данные истекли.
+    """
+    fields = ("status", "owner", "total") + COUNTERS
+    values = cache.get_many([_key(mailing_id, field) for field in fields])
+    if not values:
+        return None
+    progress = {field: values.get(_key(mailing_id, field)) for field in fields}
+    for field in COUNTERS:
+        progress[field] = progress[field] or 0
+    return progress
@@ -0,0 +1,164 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .models import Attempt, DailyAttemptRollup, HourlyAttemptRollup, RollupWatermark
+
+WATERMARK = "attempts"
+
+# Масштабы графика: модель сводки, шаг и сколько шагов показывать.
+SCALES = {
+    "hour": (HourlyAttemptRollup, timedelta(hours=1), 48),
+    "day": (DailyAttemptRollup, timedelta(days=1), 30),
+}
+
+
+def day_start(moment):
+    """Начало суток `moment` в часовом поясе `TIME_ZONE`."""
+    local = timezone.localtime(moment)
+    return timezone.make_aware(local.replace(tzinfo=None, hour=0, minute=0, second=0, microsecond=0))
+
+
+def _merge(model, deltas: Counter):
+    """Прибавляет `deltas` к строкам сводки `model`.
+
+    `deltas` — счётчик по ключу `(bucket, mailing_id, owner_id, status)`.
+    Существующие строки читаются одним запросом, суммы записываются
+    одним upsert-ом (`bulk_create(update_conflicts=True)`).
+    """
+    if not deltas:
+        return
+    existing = {
+        (row.bucket, row.mailing_id, row.status): row.count
+        for row in model.objects.filter(
+            bucket__in={key[0] for key in deltas},
+            mailing_id__in={key[1] for key in deltas},
+        ).only("bucket", "mailing_id", "status", "count")
+    }
+    model.objects.bulk_create(
+        [
+            model(
+                bucket=bucket, mailing_id=mailing_id, owner_id=owner_id, status=status,
+                count=existing.get((bucket, mailing_id, status), 0) + count,
+            )
+            for (bucket, mailing_id, owner_id, status), count in deltas.items()
+        ],
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=["bucket", "mailing", "status"],
+        update_fields=["count"],
+    )
+
+
+def _roll_window(start, end) -> int:
+    """Учитывает в сводках попытки с `start < date <= end`.
+
+    Возвращает число учтённых попыток.
+    """
+    rows = (
+        Attempt.objects
+        .filter(date__gt=start, date__lte=end)
+        .order_by()
+        .annotate(hour=TruncHour("date"))
+        .values_list("hour", "mailing_id", "mailing__owner_id", "status")
+        .annotate(n=Count("*"))
+    )
+    hourly, daily = Counter(), Counter()
+    for hour, mailing_id, owner_id, status, count in rows:
+        hourly[hour, mailing_id, owner_id, status] += count
+        daily[day_start(hour), mailing_id, owner_id, status] += count
+    _merge(HourlyAttemptRollup, hourly)
+    _merge(DailyAttemptRollup, daily)
+    return sum(hourly.values())
+
+
+def roll_up(lag: float = None, window: timedelta = None) -> dict:
+    """Переносит в сводки попытки, появившиеся после отметки `RollupWatermark`.
+
+    Обрабатываются только попытки новее отметки и старше `lag` секунд
+    (по умолчанию `MAILING_ROLLUP_LAG`): буфер отправителя пишет попытки
+    с опозданием до `MAILING_ATTEMPT_FLUSH_INTERVAL` секунд, и запаздывающие
+    записи не должны оказаться позади отметки. Диапазон режется на окна
+    по `window` (по умолчанию `MAILING_ROLLUP_WINDOW` часов); каждое окно
+    и сдвиг отметки — одна транзакция, так что прерванный запуск
+    продолжится с того же места без двойного счёта.
+
+    Одновременно работает только один агрегатор: строка отметки
+    блокируется на время окна.
+
+    Возвращает:
+        dict: attempts — сколько попыток учтено, watermark — новая отметка.
+    """
+    lag = settings.MAILING_ROLLUP_LAG if lag is None else lag
+    window = window or timedelta(hours=settings.MAILING_ROLLUP_WINDOW)
+    cutoff = timezone.now() - timedelta(seconds=lag)
+    if not RollupWatermark.objects.filter(name=WATERMARK).exists():
+        first = Attempt.objects.aggregate(first=Min("date"))["first"]
+        start = (first or cutoff) - timedelta(microseconds=1)
+        RollupWatermark.objects.get_or_create(name=WATERMARK, defaults={"value": start})
+
+    attempts = 0
+    while True:
+        with transaction.atomic():
+            watermark = RollupWatermark.objects.select_for_update().get(name=WATERMARK)
+            if watermark.value >= cutoff:
+                return {"attempts": attempts, "watermark": watermark.value}
+            end = min(watermark.value + window, cutoff)
+            attempts += _roll_window(watermark.value, end)
+            watermark.value = end
+            watermark.save(update_fields=["value"])
+
+
+def rebuild():
+    """Очищает сводки и отметку; следующий `roll_up` пересчитает всё заново."""
+    with transaction.atomic():
+        RollupWatermark.objects.filter(name=WATERMARK).delete()
+        HourlyAttemptRollup.objects.all().delete()
+        DailyAttemptRollup.objects.all().delete()
+
+
+def watermark():
+    """До какого момента попытки учтены в сводках (None — сводок ещё нет)."""
+    return RollupWatermark.objects.filter(name=WATERMARK).values_list("value", flat=True).first()
+
+
+def attempt_series(scale: str = "day", now=None, **filters) -> list:
+    """Ряд попыток по периодам из сводок, без обращения к `Attempt`.
+
+    Аргументы:
+        scale (str): "hour" — последние 48 часов, "day" — последние 30 дней.
+        now (datetime | None): правая граница ряда, по умолчанию — текущее время.
+        **filters: фильтр сводок, например owner=user или mailing=mailing.
+
+    Возвращает:
+        list: словари bucket, succeeded, failed по всем периодам подряд,
+        включая пустые.
+    """
+    model, step, length = SCALES[scale]
+    now = now or timezone.now()
+    last = day_start(now) if scale == "day" else now.replace(minute=0, second=0, microsecond=0)
+    buckets = [last - step * i for i in reversed(range(length))]
+    if scale == "day":
+        # Шаг в сутки сбивается при переходе на летнее время — выравниваем.
+        buckets = [day_start(bucket + timedelta(hours=12)) for bucket in buckets]
+    totals = (
+        model.objects
+        .filter(bucket__gte=buckets[0], **filters)
+        .order_by()
+        .values_list("bucket", "status")
+        .annotate(n=Sum("count"))
+    )
+    counts = {(bucket, status): n for bucket, status, n in totals}
+    return [
+        {
+            "bucket": bucket,
+            "succeeded": counts.get((bucket, Attempt.Status.SUCCEEDED), 0),
+            "failed": counts.get((bucket, Attempt.Status.FAILED), 0),
+        }
+        for bucket in buckets
+    ]
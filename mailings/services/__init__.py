@@ -0,0 +1,26 @@
+from ..leases import LeaseLost, MailingBusy
+from .sending import send_mailing_now
+from .threaded import send_mailing_threaded
+from .aio import asend_mailing_now, check_async_backend
+from .sharded import ShardsFailed, send_mailing_sharded
+from .jobs import claim_next_job, enqueue_mailing, run_job
+from .retries import process_due_retries
+from .scheduling import dispatch_due_mailings, finish_expired_mailings, next_wakeup
+
+__all__ = [
+    "send_mailing_now",
+    "send_mailing_threaded",
+    "asend_mailing_now",
+    "check_async_backend",
+    "send_mailing_sharded",
+    "ShardsFailed",
+    "MailingBusy",
+    "LeaseLost",
+    "enqueue_mailing",
+    "claim_next_job",
+    "run_job",
+    "dispatch_due_mailings",
+    "finish_expired_mailings",
+    "next_wakeup",
+    "process_due_retries",
+]
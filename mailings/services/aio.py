@@ -0,0 +1,264 @@
+import asyncio
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.mail.message import sanitize_address
+
+from ..buffers import AttemptBuffer
+from ..leases import MailingLease
+from ..mime import PreparedMessage
+from ..models import Mailing
+from ..throttling import athrottled
+from ..timing import RunTimings
+from .sending import auntil_end, finish_run, recipient_rows, record_result, run_clients, start_run
+
+try:
+    import aiosmtplib
+except ImportError:  # pragma: no cover - зависимость необязательная
+    aiosmtplib = None
+    ASYNC_RECONNECT_ERRORS = ()
+else:
+    ASYNC_RECONNECT_ERRORS = (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPTimeoutError, ConnectionError)
+
+
+SMTP_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+
+
+def check_async_backend():
+    """Проверяет, что `MAILING_EMAIL_BACKEND` не задан или задан SMTP.
+
+    Асинхронный движок умеет только SMTP. С файловым бэкендом он бы
+    отправил письма настоящим получателям, поэтому отказывается работать.
+    """
+    backend = settings.MAILING_EMAIL_BACKEND
+    if backend and backend != SMTP_BACKEND:
+        raise ImproperlyConfigured(
+            f"Асинхронная отправка работает только по SMTP, а MAILING_EMAIL_BACKEND = {backend}. "
+            f"Отправляйте без --asyncio или уберите MAILING_EMAIL_BACKEND."
+        )
+
+
+class AsyncSMTPPool:
+    """Пул асинхронных SMTP-сессий на одном цикле событий.
+
+    Одновременно открыто не больше `size` сессий: семафор задаёт
+    обратное давление, а свободные сессии возвращаются в очередь
+    и переиспользуются до истечения `lifetime` секунд. Подключение
+    и передача писем замеряются в `timings`.
+    """
+
+    def __init__(self, size: int, lifetime: float = None, timings: RunTimings = None):
+        if aiosmtplib is None:
+            raise ImproperlyConfigured(
+                "Для асинхронной отправки установите пакет aiosmtplib: pip install aiosmtplib"
+            )
+        self.lifetime = lifetime or settings.MAILING_SMTP_CONNECTION_LIFETIME
+        self.timings = RunTimings() if timings is None else timings
+        self._slots = asyncio.Semaphore(size)
+        self._idle = asyncio.LifoQueue()
+        self._opened = []
+
+    async def _connect(self):
+        smtp = aiosmtplib.SMTP(
+            hostname=settings.EMAIL_HOST,
+            port=settings.EMAIL_PORT,
+            username=settings.EMAIL_HOST_USER or None,
+            password=settings.EMAIL_HOST_PASSWORD or None,
+            use_tls=settings.EMAIL_USE_SSL,
+            start_tls=settings.EMAIL_USE_TLS or None,
+            timeout=settings.EMAIL_TIMEOUT,
+        )
+        with self.timings.measure("connect"):
+            await smtp.connect()
+        smtp.opened_at = time.monotonic()
+        self._opened.append(smtp)
+        return smtp
+
+    async def _acquire(self):
+        while not self._idle.empty():
+            smtp = self._idle.get_nowait()
+            if smtp.is_connected and time.monotonic() - smtp.opened_at < self.lifetime:
+                return smtp
+            await self._quit(smtp)
+        return await self._connect()
+
+    def _release(self, smtp):
+        if smtp.is_connected:
+            self._idle.put_nowait(smtp)
+        else:
+            self._drop(smtp)
+
+    def _drop(self, smtp):
+        if smtp in self._opened:
+            self._opened.remove(smtp)
+        smtp.close()
+
+    async def _quit(self, smtp):
+        try:
+            await smtp.quit()
+        except (aiosmtplib.SMTPException, OSError):
+            pass
+        self._drop(smtp)
+
+    async def send(self, message) -> int:
+        """Отправляет письмо Django (`EmailMessage`) через свободную сессию.
+
+        После разрыва соединения сервером письмо отправляется повторно
+        один раз по новой сессии.
+        """
+        encoding = message.encoding or settings.DEFAULT_CHARSET
+        from_email = sanitize_address(message.from_email, encoding)
+        recipients = [sanitize_address(addr, encoding) for addr in message.recipients()]
+        data = message.message().as_bytes(linesep="\r\n")
+
+        async with self._slots:
+            smtp = await self._acquire()
+            try:
+                try:
+                    with self.timings.measure("send"):
+                        await smtp.sendmail(from_email, recipients, data)
+                except ASYNC_RECONNECT_ERRORS:
+                    self._drop(smtp)
+                    smtp = await self._connect()
+                    with self.timings.measure("send"):
+                        await smtp.sendmail(from_email, recipients, data)
+            except (aiosmtplib.SMTPResponseException, aiosmtplib.SMTPRecipientsRefused):
+                # Сервер отклонил письмо, но сессия осталась рабочей.
+                self._release(smtp)
+                raise
+            except BaseException:
+                self._drop(smtp)
+                raise
+            self._release(smtp)
+        return 1
+
+    async def close(self):
+        for smtp in list(self._opened):
+            await self._quit(smtp)
+
+
+def _record_batch(attempts: AttemptBuffer, stats: dict, mailing: Mailing, results: list):
+    for client_id, sent, error in results:
+        record_result(attempts, stats, mailing, client_id, sent=sent, error=error)
+
+
+async def asend_mailing_now(mailing: Mailing, concurrency: int = None, resume: bool = False) -> dict:
+    """Асинхронно отправляет рассылку через `aiosmtplib`.
+
+    Все SMTP-сессии обслуживаются одним циклом событий, число
+    одновременных отправок ограничено `concurrency`
+    (по умолчанию `MAILING_ASYNC_CONCURRENCY`). Результаты собирает
+    единственная задача-писатель, которая сохраняет попытки пачками
+    в отдельном потоке, не блокируя цикл событий.
+
+    При `resume=True` письма получают только те, кому в текущем
+    запуске ещё ничего не доставлено (см. `undelivered_clients`).
+
+    После времени окончания рассылки новые письма не отправляются.
+
+    Рассылка арендуется так же, как в `send_mailing_now`. При прерывании
+    попытки уже начатых отправок записываются; если падает запись
+    попыток, отправки отменяются и ошибка пробрасывается.
+
+    Корутину можно вызывать из асинхронного кода ASGI-приложения
+    (`config.asgi.send_mailing`) или через `asyncio.run` из management-команды.
+
+    Если в `MAILING_EMAIL_BACKEND` задан не SMTP-бэкенд, бросает
+    `ImproperlyConfigured` (см. `check_async_backend`).
+
+    Возвращает словарь статистики того же вида, что и `send_mailing_now`.
+    """
+    check_async_backend()
+    async with MailingLease(mailing) as lease:
+        return await _asend(mailing, concurrency, resume or lease.reclaimed, lease)
+
+
+async def _asend(mailing: Mailing, concurrency: int, resume: bool, lease: MailingLease) -> dict:
+    concurrency = concurrency or settings.MAILING_ASYNC_CONCURRENCY
+    timings = RunTimings()
+    pool = AsyncSMTPPool(size=concurrency, timings=timings)
+    await sync_to_async(start_run)(mailing, resume=resume)
+    # Подгружаем сообщение заранее: ленивый доступ к FK внутри цикла событий запрещён.
+    await sync_to_async(lambda: mailing.message)()
+    message = PreparedMessage.for_mailing(mailing)
+
+    stats = {"total": 0, "ok": 0, "failed": 0}
+    attempts = AttemptBuffer(timings=timings)
+    attempts.start()
+    results = asyncio.Queue(maxsize=concurrency * 4)
+
+    async def writer():
+        batch = []
+        while True:
+            item = await results.get()
+            if item is not None:
+                batch.append(item)
+            if batch and (item is None or len(batch) >= attempts.size or results.empty()):
+                await sync_to_async(_record_batch)(attempts, stats, mailing, batch)
+                batch = []
+            if item is None:
+                await sync_to_async(attempts.close)()
+                return
+
+    async def deliver(client):
+        try:
+            sent = await pool.send(message.to(client))
+        except Exception as e:
+            await results.put((client.id, 0, e))
+        else:
+            await results.put((client.id, sent, None))
+
+    writer_task = asyncio.create_task(writer())
+    tasks = set()
+
+    async def settle():
+        """Ждёт завершения хотя бы одной отправки или падения писателя.
+
+        Если писатель упал, его исключение пробрасывается: иначе отправки
+        навсегда встанут на переполненной очереди результатов.
+        """
+        nonlocal tasks
+        done, tasks = await asyncio.wait(tasks | {writer_task}, return_when=asyncio.FIRST_COMPLETED)
+        tasks.discard(writer_task)
+        if writer_task in done:
+            writer_task.result()
+            raise RuntimeError("Задача записи попыток завершилась раньше отправок")
+
+    try:
+        recipients = recipient_rows(run_clients(mailing, resume)).aiterator(
+            chunk_size=settings.MAILING_RECIPIENT_CHUNK_SIZE,
+        )
+        async for client in auntil_end(athrottled(timings.atimed_iter("fetch", recipients)), mailing):
+            lease.check()
+            # Не создаём больше задач, чем может быть в работе, — иначе
+            # на миллионе получателей упрёмся в память.
+            while len(tasks) >= concurrency * 4:
+                await settle()
+            tasks.add(asyncio.create_task(deliver(client)))
+        while tasks:
+            await settle()
+    finally:
+        try:
+            # При прерывании (`LeaseLost`, ошибка) уже начатые отправки
+            # доводим до конца, чтобы их попытки были записаны.
+            while tasks and not writer_task.done():
+                await settle()
+        finally:
+            try:
+                if writer_task.done():
+                    # Писатель упал: результаты принять некому, отправки отменяем.
+                    for task in tasks:
+                        task.cancel()
+                    await asyncio.gather(*tasks, return_exceptions=True)
+                else:
+                    await results.put(None)
+                await writer_task
+            finally:
+                await sync_to_async(attempts.stop)()
+                await pool.close()
+
+    await sync_to_async(finish_run)(mailing, timings)
+
+    return stats
@@ -0,0 +1,130 @@
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from ..models import Mailing, SendJob
+from .sending import send_mailing_now
+
+
+def enqueue_mailing(mailing: Mailing) -> tuple:
+    """Ставит рассылку в очередь на отправку.
+
+    Если для рассылки уже есть задание в очереди или в работе,
+    новое не создаётся.
+
+    Возвращает:
+        tuple: (задание, создано ли новое задание).
+    """
+    with transaction.atomic():
+        # Блокируем рассылку, чтобы два одновременных клика не создали два задания.
+        Mailing.objects.select_for_update().filter(pk=mailing.pk).first()
+        job = (SendJob.objects
+               .filter(mailing=mailing, status__in=SendJob.ACTIVE_STATUSES)
+               .first())
+        if job is not None:
+            return job, False
+        return SendJob.objects.create(mailing=mailing), True
+
+
+def stale_jobs():
+    """Задания, брошенные упавшим воркером.
+
+    Задание «Выполняется» дольше `MAILING_LEASE_TTL` секунд, а аренды
+    рассылки нет или она истекла — значит, его никто не отправляет.
+    """
+    now = timezone.now()
+    return SendJob.objects.filter(
+        Q(mailing__lease_expires_at__isnull=True) | Q(mailing__lease_expires_at__lte=now),
+        status=SendJob.Status.RUNNING,
+        started_at__lte=now - timedelta(seconds=settings.MAILING_LEASE_TTL),
+    ).exclude(mailing__status=Mailing.Status.FINISHED)
+
+
+def claim_next_job(worker: str):
+    """Забирает самое старое задание из очереди.
+
+    Строка блокируется через `FOR UPDATE SKIP LOCKED`: задания, которые
+    прямо сейчас забирают другие воркеры, пропускаются без ожидания.
+    Если очередь пуста, забирается задание упавшего воркера (`stale_jobs`);
+    у такого задания `reclaimed=True`, и `run_job` докачивает рассылку.
+
+    Возвращает:
+        SendJob | None: задание в статусе «Выполняется» или None,
+        если очередь пуста.
+    """
+    with transaction.atomic():
+        job = (SendJob.objects
+               .select_for_update(skip_locked=True)
+               .filter(status=SendJob.Status.QUEUED)
+               .order_by('created_at')
+               .first())
+        if job is None:
+            job = (stale_jobs()
+                   .select_for_update(skip_locked=True, of=('self',))
+                   .order_by('started_at')
+                   .first())
+        if job is None:
+            return None
+        job.reclaimed = job.status == SendJob.Status.RUNNING
+        job.status = SendJob.Status.RUNNING
+        job.started_at = timezone.now()
+        job.worker = worker
+        job.save(update_fields=['status', 'started_at', 'worker'])
+    return job
+
+
+def skip_reason(job: SendJob) -> str:
+    """Почему задание выполнять не нужно; пустая строка — нужно.
+
+    Задание лишнее, если время окончания рассылки прошло или рассылку
+    отправляет другое задание: более раннее из ещё не выполненных
+    или выполненное уже после постановки этого в очередь.
+    """
+    if job.mailing.end_time <= timezone.now():
+        return "время окончания рассылки прошло"
+    active = Q(status__in=SendJob.ACTIVE_STATUSES) & (
+        Q(created_at__lt=job.created_at) | Q(created_at=job.created_at, pk__lt=job.pk)
+    )
+    done_after = Q(status=SendJob.Status.DONE, started_at__gte=job.created_at)
+    other = (SendJob.objects
+             .filter(active | done_after, mailing_id=job.mailing_id)
+             .exclude(pk=job.pk)
+             .order_by('created_at')
+             .first())
+    if other is not None:
+        return f"рассылку отправляет задание #{other.pk}"
+    return ""
+
+
+def run_job(job: SendJob, **send_options) -> SendJob:
+    """Выполняет задание и сохраняет его итог.
+
+    Дополнительные аргументы передаются в `send_mailing_now`; задание,
+    забранное у упавшего воркера, отправляется как докачка. Лишнее
+    задание (`skip_reason`) не отправляется и получает статус «Пропущено».
+    Ошибка отправки не пробрасывается, а сохраняется в задании.
+    """
+    if getattr(job, 'reclaimed', False):
+        send_options['resume'] = True
+    reason = skip_reason(job)
+    if reason:
+        job.status = SendJob.Status.SKIPPED
+        job.error = reason
+    else:
+        try:
+            stats = send_mailing_now(job.mailing, **send_options)
+        except Exception:
+            job.status = SendJob.Status.FAILED
+            job.error = traceback.format_exc()
+        else:
+            job.status = SendJob.Status.DONE
+            job.total = stats['total']
+            job.ok = stats['ok']
+            job.failed = stats['failed']
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'total', 'ok', 'failed', 'finished_at'])
+    return job
@@ -0,0 +1,90 @@
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from ..buffers import AttemptBuffer
+from ..mime import PreparedMessage
+from ..models import Attempt, DeliveryRetry
+from ..smtp import SMTPConnectionPool
+from ..throttling import throttled
+from .sending import record_result
+
+# Повтор вместе с адресом — в таком виде его понимает `throttled`.
+_Due = namedtuple("_Due", "retry email")
+
+
+def claim_due_retries(batch_size: int = None, now=None) -> list:
+    """Забирает пачку наступивших повторов.
+
+    Повторы получателей, которым письмо уже доставлено в текущем запуске
+    рассылки, и повторы рассылок, время окончания которых прошло,
+    удаляются без отправки. Остальные блокируются через
+    `FOR UPDATE SKIP LOCKED` и откладываются на
+    `MAILING_RETRY_CLAIM_TIMEOUT` секунд: если воркер упадёт,
+    повтор снова станет доступен после этой паузы.
+    """
+    now = now or timezone.now()
+    batch_size = batch_size or settings.MAILING_RETRY_BATCH_SIZE
+    delivered = Attempt.objects.filter(
+        mailing=OuterRef("mailing"),
+        client=OuterRef("client"),
+        status=Attempt.Status.SUCCEEDED,
+        date__gte=OuterRef("mailing__started_at"),
+    )
+    with transaction.atomic():
+        retries = list(DeliveryRetry.objects
+                       .select_for_update(skip_locked=True, of=("self",))
+                       .filter(next_try_at__lte=now)
+                       .annotate(delivered=Exists(delivered))
+                       .select_related("mailing__message", "client")
+                       .order_by("next_try_at")[:batch_size])
+        stale = {retry.pk for retry in retries if retry.delivered or retry.mailing.end_time <= now}
+        if stale:
+            DeliveryRetry.objects.filter(pk__in=stale).delete()
+        retries = [retry for retry in retries if retry.pk not in stale]
+        DeliveryRetry.objects.filter(pk__in=[retry.pk for retry in retries]).update(
+            next_try_at=now + timedelta(seconds=settings.MAILING_RETRY_CLAIM_TIMEOUT),
+        )
+    return retries
+
+
+def process_due_retries(batch_size: int = None) -> dict:
+    """Повторно отправляет письма из очереди повторов одной пачкой.
+
+    Отправляются только получатели, чьи письма упали с временной ошибкой.
+    Каждый повтор записывается в `Attempt`. После успеха или окончательной
+    ошибки повтор удаляется; после новой временной ошибки — переносится
+    с удвоенной паузой (см. `retry_delay`).
+
+    Возвращает словарь статистики того же вида, что и `send_mailing_now`.
+    """
+    stats = {"total": 0, "ok": 0, "failed": 0}
+    retries = claim_due_retries(batch_size)
+    if not retries:
+        return stats
+
+    done = []
+    # Письмо каждой рассылки кодируется один раз на пачку.
+    messages = {}
+    with SMTPConnectionPool() as pool, AttemptBuffer() as attempts:
+        for due in throttled(_Due(retry, retry.client.email) for retry in retries):
+            retry = due.retry
+            try:
+                if retry.mailing_id not in messages:
+                    messages[retry.mailing_id] = PreparedMessage.for_mailing(retry.mailing)
+                sent = pool.send(messages[retry.mailing_id].to(retry.client))
+            except Exception as e:
+                rescheduled = record_result(attempts, stats, retry.mailing, retry.client_id,
+                                            error=e, retries=retry.retries)
+            else:
+                rescheduled = record_result(attempts, stats, retry.mailing, retry.client_id, sent=sent)
+            if not rescheduled:
+                done.append(retry.pk)
+
+    # Повторы, перенесённые при сбросе буфера, обновились на месте и в `done` не попали.
+    DeliveryRetry.objects.filter(pk__in=done).delete()
+    return stats
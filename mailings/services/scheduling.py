@@ -0,0 +1,80 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from ..models import Mailing, SendJob
+
+
+def due_mailings(now):
+    """Рассылки, время запуска которых наступило, а окончание — ещё нет.
+
+    Запрос обслуживается частичным индексом `mailing_due_idx`.
+    """
+    return (Mailing.objects
+            .filter(status=Mailing.Status.CREATED, start_time__lte=now, end_time__gt=now)
+            .order_by('start_time'))
+
+
+def dispatch_due_mailings(now=None, batch_size: int = None) -> int:
+    """Запускает наступившие рассылки пачками по `batch_size`.
+
+    Для каждой рассылки создаётся задание в очереди отправки, а сама
+    рассылка переводится в статус «Запущена». Строки блокируются через
+    `FOR UPDATE SKIP LOCKED`, так что несколько планировщиков не
+    запустят одну рассылку дважды. Рассылка, которую уже поставили
+    в очередь вручную (`enqueue_mailing`), второго задания не получает.
+
+    Возвращает число запущенных рассылок.
+    """
+    now = now or timezone.now()
+    batch_size = batch_size or settings.MAILING_SCHEDULER_BATCH_SIZE
+    dispatched = 0
+    while True:
+        with transaction.atomic():
+            ids = list(due_mailings(now)
+                       .select_for_update(skip_locked=True)
+                       .values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            Mailing.objects.filter(pk__in=ids).update(status=Mailing.Status.RUNNING)
+            # `enqueue_mailing` блокирует ту же строку рассылки, так что проверка не гоняется с ним.
+            queued = set(SendJob.objects
+                         .filter(mailing_id__in=ids, status__in=SendJob.ACTIVE_STATUSES)
+                         .values_list('mailing_id', flat=True))
+            SendJob.objects.bulk_create([SendJob(mailing_id=pk) for pk in ids if pk not in queued])
+        dispatched += len(ids)
+        if len(ids) < batch_size:
+            break
+    return dispatched
+
+
+def finish_expired_mailings(now=None) -> int:
+    """Завершает рассылки, у которых прошло время окончания.
+
+    Запрос обслуживается частичным индексом `mailing_expiry_idx`.
+    Отправители сами останавливаются на `end_time` (`until_end`),
+    а задания таких рассылок `run_job` пропускает.
+    Возвращает число завершённых рассылок.
+    """
+    now = now or timezone.now()
+    return (Mailing.objects
+            .filter(end_time__lte=now)
+            .exclude(status=Mailing.Status.FINISHED)
+            .update(status=Mailing.Status.FINISHED))
+
+
+def next_wakeup():
+    """Ближайший момент, когда планировщику будет что делать.
+
+    Это минимум из ближайшего времени запуска ещё не запущенных рассылок
+    и ближайшего времени окончания незавершённых. None — событий нет.
+    """
+    next_start = (Mailing.objects
+                  .filter(status=Mailing.Status.CREATED)
+                  .aggregate(at=Min('start_time'))['at'])
+    next_end = (Mailing.objects
+                .exclude(status=Mailing.Status.FINISHED)
+                .aggregate(at=Min('end_time'))['at'])
+    candidates = [at for at in (next_start, next_end) if at is not None]
+    return min(candidates) if candidates else None
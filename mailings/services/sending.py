@@ -0,0 +1,218 @@
+from django.conf import settings
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from ..buffers import AttemptBuffer
+from ..leases import MailingLease
+from ..mime import PreparedMessage
+from ..models import Attempt, Mailing
+from ..progress import finish_progress, start_progress
+from ..smtp import SMTPConnectionPool, is_transient_error
+from ..throttling import throttled
+from ..timing import RunTimings
+
+
+# Поля получателя, которые нужны для отправки. `comment` и прочее не читаем.
+RECIPIENT_FIELDS = ("id", "email", "full_name")
+
+
+def recipient_rows(clients):
+    """Превращает выборку клиентов в лёгкие строки `(id, email, full_name)`.
+
+    Строки — именованные кортежи, поэтому к ним можно обращаться
+    как к клиенту: `row.email`, `row.full_name`. Сортировка снимается,
+    чтобы не сортировать всю аудиторию ради отправки.
+    """
+    return clients.order_by().values_list(*RECIPIENT_FIELDS, named=True)
+
+
+def iter_recipients(clients):
+    """Потоково читает получателей порциями через серверный курсор.
+
+    Потребление памяти не зависит от размера аудитории: в памяти
+    держится не больше `MAILING_RECIPIENT_CHUNK_SIZE` строк.
+    """
+    return recipient_rows(clients).iterator(chunk_size=settings.MAILING_RECIPIENT_CHUNK_SIZE)
+
+
+def until_end(recipients, mailing: Mailing):
+    """Выдаёт получателей, пока не наступило время окончания рассылки.
+
+    После `end_time` письма не отправляются: перебор просто заканчивается,
+    и запуск завершается с тем, что успел отправить.
+    """
+    for recipient in recipients:
+        if timezone.now() >= mailing.end_time:
+            return
+        yield recipient
+
+
+async def auntil_end(recipients, mailing: Mailing):
+    """Асинхронный вариант `until_end`."""
+    async for recipient in recipients:
+        if timezone.now() >= mailing.end_time:
+            return
+        yield recipient
+
+
+def start_run(mailing: Mailing, resume: bool = False):
+    """Перечитывает рассылку из БД и переводит её в статус «Запущена».
+
+    Новый запуск запоминает время начала в `started_at` и обнуляет
+    счётчики прогресса в кэше; при докачке (`resume=True`) время начала
+    прерванного запуска и счётчики сохраняются.
+    """
+    mailing.refresh_from_db()
+    new_run = not resume or mailing.started_at is None
+    update_fields = []
+    if mailing.status != Mailing.Status.RUNNING:
+        mailing.status = Mailing.Status.RUNNING
+        update_fields.append("status")
+    if new_run:
+        mailing.started_at = timezone.now()
+        update_fields.append("started_at")
+    mailing.save(update_fields=update_fields)
+    start_progress(mailing, total=mailing.clients.count() if new_run else None, reset=new_run)
+
+
+def undelivered_clients(mailing: Mailing):
+    """Получатели, которым в текущем запуске письмо ещё не доставлено.
+
+    Уже доставленные отсекаются одним анти-join (`NOT EXISTS`) по индексу
+    `attempt_delivered_idx`, а не проверкой каждого получателя.
+    """
+    delivered = Attempt.objects.filter(
+        mailing=mailing,
+        client=OuterRef("pk"),
+        status=Attempt.Status.SUCCEEDED,
+    )
+    if mailing.started_at is not None:
+        delivered = delivered.filter(date__gte=mailing.started_at)
+    return mailing.clients.filter(~Exists(delivered))
+
+
+def run_clients(mailing: Mailing, resume: bool = False):
+    """Выборка получателей запуска: все или, при докачке, только недоставленные."""
+    return undelivered_clients(mailing) if resume else mailing.clients.all()
+
+
+def finish_run(mailing: Mailing, timings: RunTimings = None):
+    """Переводит рассылку в статус «Завершена» и сохраняет замеры запуска."""
+    mailing.status = Mailing.Status.FINISHED
+    update_fields = ["status"]
+    if timings is not None:
+        timings.finish()
+        mailing.run_timings = timings.as_dict()
+        update_fields.append("run_timings")
+    mailing.save(update_fields=update_fields)
+    finish_progress(mailing)
+
+
+def record_result(attempts: AttemptBuffer, stats: dict, mailing: Mailing, client_id: int,
+                  sent: int = 0, error: Exception = None, retries: int = 0) -> bool:
+    """Фиксирует результат отправки получателю с pk `client_id`.
+
+    Добавляет попытку в буфер и обновляет счётчики `stats`. Если ошибка
+    временная и лимит `MAILING_RETRY_MAX_ATTEMPTS` не исчерпан, письмо
+    ставится в очередь повторной отправки; `retries` — сколько повторов
+    для этого письма уже было.
+
+    Возвращает True, если запланирован повтор.
+    """
+    stats["total"] += 1
+    if error is not None:
+        attempts.add(
+            mailing=mailing,
+            client_id=client_id,
+            status=Attempt.Status.FAILED,
+            reply=str(error),
+        )
+        stats["failed"] += 1
+        if is_transient_error(error) and retries < settings.MAILING_RETRY_MAX_ATTEMPTS:
+            attempts.schedule_retry(mailing.pk, client_id, retries + 1, error)
+            return True
+    elif sent == 1:
+        attempts.add(
+            mailing=mailing,
+            client_id=client_id,
+            status=Attempt.Status.SUCCEEDED,
+            reply="OK",
+        )
+        stats["ok"] += 1
+    else:
+        attempts.add(
+            mailing=mailing,
+            client_id=client_id,
+            status=Attempt.Status.FAILED,
+            reply="Неизвестный результат: send_mail вернул 0",
+        )
+        stats["failed"] += 1
+    return False
+
+
+def deliver(mailing: Mailing, clients, stats: dict, timings: RunTimings = None, lease: MailingLease = None):
+    """Последовательно отправляет письма рассылки получателям `clients`.
+
+    `clients` — выборка `Client`; получатели читаются через `iter_recipients`
+    и выдаются с учётом лимитов доменов (`throttled`).
+
+    Письмо кодируется один раз (`PreparedMessage`), для получателя
+    меняются только его заголовки. Время фаз отправки копится в `timings`.
+    Если аренда `lease` потеряна, отправка прерывается (`LeaseLost`);
+    после времени окончания рассылки новые письма не отправляются.
+    Статус рассылки не меняет — этим занимается вызывающий код.
+    """
+    timings = RunTimings() if timings is None else timings
+    message = PreparedMessage.for_mailing(mailing)
+    with SMTPConnectionPool(timings=timings) as pool, AttemptBuffer(timings=timings) as attempts:
+        for client in until_end(throttled(timings.timed_iter("fetch", iter_recipients(clients))), mailing):
+            if lease is not None:
+                lease.check()
+            try:
+                sent = pool.send(message.to(client))
+            except Exception as e:
+                record_result(attempts, stats, mailing, client.id, error=e)
+            else:
+                record_result(attempts, stats, mailing, client.id, sent=sent)
+
+
+def send_mailing_now(mailing: Mailing, concurrency: int = 1, resume: bool = False) -> dict:
+    """Выполняет немедленную отправку выбранной рассылки.
+
+    Для каждого клиента рассылки отправляется письмо и фиксируется результат
+    (успех или ошибка) в модели Attempt. Письма уходят через пул
+    долгоживущих SMTP-соединений, открытый на время запуска, а попытки
+    сохраняются пачками через буфер отложенной записи. Время по фазам
+    (чтение получателей, подключение, передача, запись попыток)
+    сохраняется в `Mailing.run_timings`.
+
+    На время отправки рассылка арендуется (`MailingLease`): второй
+    одновременный запуск получает `MailingBusy`, а рассылку упавшего
+    отправителя после истечения аренды можно запустить снова — она
+    докачивается.
+
+    Аргументы:
+        mailing (Mailing): объект рассылки, который нужно отправить.
+        concurrency (int): число потоков отправки; при значении больше 1
+            используется параллельный движок `send_mailing_threaded`.
+        resume (bool): докачка прерванного запуска — письма получают
+            только те, кому в этом запуске ещё ничего не доставлено.
+
+    Возвращает:
+        dict: словарь со статистикой отправки:
+            - total (int): общее количество попыток отправки,
+            - ok (int): количество успешных отправок,
+            - failed (int): количество неуспешных отправок.
+    """
+    if concurrency > 1:
+        from .threaded import send_mailing_threaded
+        return send_mailing_threaded(mailing, concurrency, resume=resume)
+
+    timings = RunTimings()
+    stats = {"total": 0, "ok": 0, "failed": 0}
+    with MailingLease(mailing) as lease:
+        resume = resume or lease.reclaimed
+        start_run(mailing, resume=resume)
+        deliver(mailing, run_clients(mailing, resume), stats, timings, lease)
+        finish_run(mailing, timings)
+
+    return stats
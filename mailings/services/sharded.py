@@ -0,0 +1,178 @@
+import multiprocessing
+import signal
+import sys
+import traceback
+from multiprocessing.connection import wait
+
+from django.db import connections
+
+from ..leases import MailingLease
+from ..models import Mailing
+from ..timing import RunTimings
+from .sending import deliver, finish_run, run_clients, start_run
+from .threaded import deliver_threaded
+
+
+class ShardsFailed(Exception):
+    """Часть шардов завершилась с ошибкой.
+
+    Рассылка остаётся в статусе «Запущена», чтобы её можно было
+    перезапустить. Атрибуты:
+        stats (dict): статистика по успешно завершившимся шардам.
+        errors (dict): номер шарда → текст ошибки.
+    """
+
+    def __init__(self, stats: dict, errors: dict):
+        self.stats = stats
+        self.errors = errors
+        super().__init__(
+            "Шарды завершились с ошибкой: " + ", ".join(f"#{i}" for i in sorted(errors))
+        )
+
+
+def shard_ranges(mailing: Mailing, shards: int) -> list:
+    """Делит получателей рассылки на непересекающиеся диапазоны по pk.
+
+    Возвращает список пар `(lo, hi)` для фильтра `pk__gte=lo, pk__lt=hi`;
+    `None` означает открытую границу. Диапазоны примерно равны по числу
+    получателей.
+    """
+    pks = mailing.clients.order_by("pk").values_list("pk", flat=True)
+    total = pks.count()
+    shards = max(1, min(shards, total))
+    bounds = [None] + [pks[total * i // shards] for i in range(1, shards)] + [None]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _shard_clients(mailing: Mailing, lo, hi, resume: bool):
+    clients = run_clients(mailing, resume)
+    if lo is not None:
+        clients = clients.filter(pk__gte=lo)
+    if hi is not None:
+        clients = clients.filter(pk__lt=hi)
+    return clients
+
+
+def _exit_on_sigterm(signum, frame):
+    # Родитель останавливает шарды по SIGTERM: SystemExit раскручивает стек,
+    # и уже полученные результаты успевают сохраниться.
+    sys.exit(128 + signum)
+
+
+def _run_shard(conn, mailing_id: int, lo, hi, concurrency: int, resume: bool):
+    """Точка входа дочернего процесса: отправляет один диапазон получателей."""
+    signal.signal(signal.SIGTERM, _exit_on_sigterm)
+    # Соединение с БД, унаследованное от родителя, использовать нельзя.
+    connections.close_all()
+    try:
+        mailing = Mailing.objects.select_related("message").get(pk=mailing_id)
+        stats = {"total": 0, "ok": 0, "failed": 0}
+        timings = RunTimings()
+        clients = _shard_clients(mailing, lo, hi, resume)
+        if concurrency > 1:
+            deliver_threaded(mailing, clients, stats, concurrency, timings)
+        else:
+            deliver(mailing, clients, stats, timings)
+        conn.send((stats, timings.as_dict(), None))
+    except BaseException:
+        conn.send((None, None, traceback.format_exc()))
+        raise
+    finally:
+        conn.close()
+        connections.close_all()
+
+
+def send_mailing_sharded(mailing: Mailing, processes: int, concurrency: int = 1, resume: bool = False) -> dict:
+    """Отправляет рассылку в `processes` дочерних процессах.
+
+    Получатели делятся на непересекающиеся диапазоны по первичному ключу
+    (`shard_ranges`), и каждый диапазон отправляется отдельным процессом
+    со своим соединением с БД и своими SMTP-соединениями. Статус рассылки
+    меняет только родительский процесс: «Запущена» — до старта шардов,
+    «Завершена» — один раз, когда все шарды отработали успешно.
+
+    Аренду рассылки (`MailingLease`) держит и продлевает родительский
+    процесс на всё время работы шардов; пока создаются дочерние процессы,
+    поток продления остановлен, чтобы `fork` шёл из однопоточного процесса.
+    Пока шарды работают, родитель раз в `MAILING_LEASE_HEARTBEAT` секунд
+    проверяет аренду; если она потеряна, шарды останавливаются по SIGTERM
+    (сохранив уже полученные результаты) и выбрасывается `LeaseLost`.
+
+    При `resume=True` каждый шард отправляет только недоставленным
+    в текущем запуске получателям своего диапазона.
+
+    Падение одного шарда не затрагивает остальные: они доходят до конца,
+    после чего выбрасывается `ShardsFailed` со статистикой успешных шардов.
+
+    Возвращает словарь статистики того же вида, что и `send_mailing_now`.
+    """
+    with MailingLease(mailing) as lease:
+        return _send_sharded(mailing, processes, concurrency, resume or lease.reclaimed, lease)
+
+
+def _send_sharded(mailing: Mailing, processes: int, concurrency: int, resume: bool, lease: MailingLease) -> dict:
+    timings = RunTimings()
+    start_run(mailing, resume=resume)
+    ranges = shard_ranges(mailing, processes)
+
+    # Дочерние процессы создаются через fork и не должны делить сокет БД с родителем.
+    connections.close_all()
+    ctx = multiprocessing.get_context("fork")
+    workers = []
+    lease.stop_heartbeat()
+    try:
+        for lo, hi in ranges:
+            parent_conn, child_conn = ctx.Pipe(duplex=False)
+            process = ctx.Process(target=_run_shard, args=(child_conn, mailing.pk, lo, hi, concurrency, resume))
+            process.start()
+            child_conn.close()
+            workers.append((process, parent_conn))
+    finally:
+        lease.start_heartbeat()
+
+    results = _collect_results(workers, lease)
+    # Аренда потеряна: рассылку уже отправляет другой, завершать её не нам.
+    lease.check()
+
+    stats = {"total": 0, "ok": 0, "failed": 0}
+    errors = {}
+    for number, (process, _) in enumerate(workers, start=1):
+        shard_stats, shard_timings, error = results[number]
+        if shard_stats is None:
+            errors[number] = error or f"код выхода {process.exitcode}"
+            continue
+        for key in stats:
+            stats[key] += shard_stats[key]
+        timings.merge(shard_timings)
+
+    if errors:
+        raise ShardsFailed(stats, errors)
+
+    finish_run(mailing, timings)
+
+    return stats
+
+
+def _collect_results(workers: list, lease: MailingLease) -> dict:
+    """Ждёт результаты шардов, следя за арендой.
+
+    Возвращает словарь: номер шарда → `(stats, timings, error)`.
+    """
+    pending = {parent_conn: number for number, (_, parent_conn) in enumerate(workers, start=1)}
+    results = {}
+    terminated = False
+    while pending:
+        for parent_conn in wait(list(pending), timeout=lease.heartbeat):
+            number = pending.pop(parent_conn)
+            try:
+                results[number] = parent_conn.recv()
+            except EOFError:
+                results[number] = (None, None, "процесс завершился без результата")
+        if lease.lost and pending and not terminated:
+            for process, _ in workers:
+                if process.is_alive():
+                    process.terminate()
+            terminated = True
+    for process, _ in workers:
+        process.join()
+    return results
@@ -0,0 +1,110 @@
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from ..buffers import AttemptBuffer
+from ..leases import MailingLease
+from ..mime import PreparedMessage
+from ..models import Mailing
+from ..smtp import SMTPConnectionPool
+from ..throttling import throttled
+from ..timing import RunTimings
+from .sending import finish_run, iter_recipients, record_result, run_clients, start_run, until_end
+
+
+class _ThreadLocalPools:
+    """Выдаёт каждому рабочему потоку собственное SMTP-соединение."""
+
+    def __init__(self, timings: RunTimings = None):
+        self.timings = timings
+        self._local = threading.local()
+        self._pools = []
+        self._lock = threading.Lock()
+
+    def get(self) -> SMTPConnectionPool:
+        pool = getattr(self._local, "pool", None)
+        if pool is None:
+            pool = SMTPConnectionPool(size=1, timings=self.timings)
+            self._local.pool = pool
+            with self._lock:
+                self._pools.append(pool)
+        return pool
+
+    def close(self):
+        for pool in self._pools:
+            pool.close()
+
+
+def deliver_threaded(mailing: Mailing, clients, stats: dict, concurrency: int, timings: RunTimings = None,
+                     lease: MailingLease = None):
+    """Отправляет письма получателям `clients` пулом из `concurrency` потоков.
+
+    Потоки только отправляют письма, каждый через своё SMTP-соединение.
+    Результаты возвращаются в вызывающий поток, который единственный
+    пишет попытки в БД. В работе одновременно держится не больше
+    `concurrency * 4` писем, чтобы память не росла с размером рассылки.
+    Время фаз копится в `timings`; передача писем суммируется по потокам.
+    Если аренда `lease` потеряна, новые письма не отправляются (`LeaseLost`);
+    после времени окончания рассылки — тоже.
+    При прерывании (исключение, `LeaseLost`, SIGTERM) попытки писем,
+    которые уже были в отправке, всё равно записываются.
+    """
+    timings = RunTimings() if timings is None else timings
+    pools = _ThreadLocalPools(timings)
+    message = PreparedMessage.for_mailing(mailing)
+
+    def send(message):
+        return pools.get().send(message)
+
+    def collect(futures):
+        for future in futures:
+            client_id = in_flight.pop(future)
+            try:
+                sent = future.result()
+            except Exception as e:
+                record_result(attempts, stats, mailing, client_id, error=e)
+            else:
+                record_result(attempts, stats, mailing, client_id, sent=sent)
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor, AttemptBuffer(timings=timings) as attempts:
+            # future → pk получателя
+            in_flight = {}
+            try:
+                recipients = throttled(timings.timed_iter("fetch", iter_recipients(clients)))
+                for client in until_end(recipients, mailing):
+                    if lease is not None:
+                        lease.check()
+                    in_flight[executor.submit(send, message.to(client))] = client.id
+                    if len(in_flight) >= concurrency * 4:
+                        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        collect(done)
+            except BaseException:
+                # Письма, которые ещё не начали отправляться, отменяем: их отправит докачка.
+                for future in list(in_flight):
+                    if future.cancel():
+                        del in_flight[future]
+                raise
+            finally:
+                # Уже отправляемые письма дойдут в любом случае — их попытки
+                # записываем до выхода из буфера, иначе докачка отправит их повторно.
+                collect(list(in_flight))
+    finally:
+        pools.close()
+
+
+def send_mailing_threaded(mailing: Mailing, concurrency: int, resume: bool = False) -> dict:
+    """Отправляет рассылку пулом из `concurrency` рабочих потоков.
+
+    Рассылка арендуется так же, как в `send_mailing_now`.
+
+    Возвращает словарь статистики того же вида, что и `send_mailing_now`.
+    """
+    timings = RunTimings()
+    stats = {"total": 0, "ok": 0, "failed": 0}
+    with MailingLease(mailing) as lease:
+        resume = resume or lease.reclaimed
+        start_run(mailing, resume=resume)
+        deliver_threaded(mailing, run_clients(mailing, resume), stats, concurrency, timings, lease)
+        finish_run(mailing, timings)
+
+    return stats
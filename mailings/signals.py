@@ -0,0 +1,65 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.dispatch import receiver
+
+from .counters import add_recipients
+from .models import Client, Mailing
+from .sketches import add_emails
+
+Recipients = Mailing.clients.through
+
+
+@receiver(m2m_changed, sender=Recipients)
+def track_recipients(sender, instance, action, reverse, pk_set, **kwargs):
+    """Поддерживает `Mailing.recipients_count` при изменении состава получателей.
+
+    Прямая сторона (`mailing.clients.add(...)`) сдвигает счётчик одной
+    рассылки на число получателей, обратная (`client.mailings.add(...)`) —
+    счётчик каждой затронутой рассылки на единицу. В `post_add` Django
+    передаёт только действительно добавленные pk, а для удаления и очистки
+    затронутые связи приходится найти заранее, в `pre_*`.
+    """
+    if action == "post_add":
+        if reverse:
+            add_recipients(pk_set, 1)
+        else:
+            add_recipients([instance.pk], len(pk_set))
+    elif action in ("pre_remove", "pre_clear"):
+        links = Recipients.objects.filter(**{"client" if reverse else "mailing": instance})
+        if action == "pre_remove":
+            links = links.filter(**{"mailing__in" if reverse else "client__in": pk_set})
+        instance._removed_recipients = (
+            list(links.values_list("mailing_id", flat=True)) if reverse else links.count()
+        )
+    elif action in ("post_remove", "post_clear"):
+        removed = instance.__dict__.pop("_removed_recipients", None)
+        if reverse:
+            add_recipients(removed, -1)
+        else:
+            add_recipients([instance.pk], -(removed or 0))
+
+
+@receiver(pre_delete, sender=Client)
+def untrack_deleted_client(sender, instance, **kwargs):
+    """Уменьшает `recipients_count` рассылок удаляемого клиента.
+
+    Связи с рассылками удаляются каскадом, без сигнала `m2m_changed`.
+    Сигнал приходит при любом удалении: `client.delete()`, удаление
+    выборкой и каскад от удаления пользователя. Обновление идёт в той же
+    транзакции, что и удаление.
+    """
+    add_recipients(list(Recipients.objects.filter(client=instance).values_list("mailing_id", flat=True)), -1)
+
+
+@receiver(post_save, sender=Client)
+def track_client_email(sender, instance, update_fields=None, **kwargs):
+    """Добавляет адрес сохранённого клиента в оценки уникальных адресов (`mailings/sketches.py`).
+
+    Запись в Redis — после фиксации транзакции, чтобы откат не оставил
+    в оценке адрес, которого нет в БД.
+    """
+    if update_fields is not None and "email" not in update_fields:
+        return
+    transaction.on_commit(partial(add_emails, instance.owner_id, [instance.email]))
@@ -0,0 +1,143 @@
+import asyncio
+import random
+import threading
+
+
+class SMTPSink:
+    """Локальный SMTP-сервер-заглушка для нагрузочных замеров отправки.
+
+    Принимает письма и никуда их не пересылает. Умеет имитировать
+    поведение настоящего почтового сервера:
+        latency (float): задержка ответа на DATA в секундах;
+        jitter (float): случайная добавка к задержке, от 0 до `jitter` секунд;
+        temp_error_rate (float): доля получателей, отклоняемых с 451;
+        perm_error_rate (float): доля получателей, отклоняемых с 550;
+        disconnect_rate (float): доля писем, на которых сервер рвёт соединение.
+
+    Работает на asyncio: либо внутри уже запущенного цикла (`serve`),
+    либо в фоновом потоке как контекстный менеджер:
+
+        with SMTPSink(latency=0.05) as sink:
+            ...  # EMAIL_HOST = sink.host, EMAIL_PORT = sink.port
+
+    Порт 0 означает «любой свободный»; выбранный порт доступен в `port`.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0, jitter: float = 0.0,
+                 temp_error_rate: float = 0.0, perm_error_rate: float = 0.0, disconnect_rate: float = 0.0,
+                 seed: int = None):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.temp_error_rate = temp_error_rate
+        self.perm_error_rate = perm_error_rate
+        self.disconnect_rate = disconnect_rate
+        self.random = random.Random(seed)
+        self.stats = {"connections": 0, "messages": 0, "temp_errors": 0, "perm_errors": 0, "disconnects": 0}
+        self._server = None
+        self._writers = set()
+        self._loop = None
+        self._thread = None
+
+    async def start(self):
+        """Начинает принимать соединения в текущем цикле событий."""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve(self):
+        """Запускает сервер и обслуживает соединения до отмены задачи."""
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+        for writer in list(self._writers):
+            writer.close()
+
+    def __enter__(self):
+        self._loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self.start())
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="smtp-sink", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        asyncio.run_coroutine_threadsafe(self.close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    async def _handle(self, reader, writer):
+        self.stats["connections"] += 1
+        self._writers.add(writer)
+
+        async def reply(line: str):
+            writer.write(line.encode() + b"\r\n")
+            await writer.drain()
+
+        recipients = []
+        try:
+            await reply("220 smtp-sink ESMTP")
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                command = line[:4].decode("ascii", "replace").upper()
+                if command == "EHLO":
+                    await reply("250-smtp-sink\r\n250-8BITMIME\r\n250-SMTPUTF8\r\n250 PIPELINING")
+                elif command == "HELO":
+                    await reply("250 smtp-sink")
+                elif command == "MAIL":
+                    recipients = []
+                    if self.random.random() < self.disconnect_rate:
+                        self.stats["disconnects"] += 1
+                        return
+                    await reply("250 OK")
+                elif command == "RCPT":
+                    chance = self.random.random()
+                    if chance < self.perm_error_rate:
+                        self.stats["perm_errors"] += 1
+                        await reply("550 No such user")
+                    elif chance < self.perm_error_rate + self.temp_error_rate:
+                        self.stats["temp_errors"] += 1
+                        await reply("451 Try again later")
+                    else:
+                        recipients.append(line)
+                        await reply("250 OK")
+                elif command == "DATA":
+                    if not recipients:
+                        await reply("503 No valid recipients")
+                        continue
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    while (await reader.readline()) not in (b".\r\n", b".\n", b""):
+                        pass
+                    delay = self.latency + self.random.uniform(0, self.jitter)
+                    if delay:
+                        await asyncio.sleep(delay)
+                    self.stats["messages"] += 1
+                    recipients = []
+                    await reply("250 OK queued")
+                elif command in ("RSET", "NOOP"):
+                    recipients = []
+                    await reply("250 OK")
+                elif command == "QUIT":
+                    await reply("221 Bye")
+                    return
+                else:
+                    await reply("502 Command not implemented")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
@@ -0,0 +1,137 @@
+import smtplib
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+
+from .timing import RunTimings
+
+# Ошибки, после которых соединение считается потерянным и открывается заново.
+RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+class PooledConnection:
+    """Долгоживущее соединение с почтовым сервером.
+
+    Оборачивает почтовый бэкенд Django (`MAILING_EMAIL_BACKEND`, по умолчанию
+    `EMAIL_BACKEND`) и переоткрывает соединение,
+    когда истекает его время жизни или сервер разорвал сессию.
+    Подключение и передача писем замеряются в `timings`.
+    """
+
+    def __init__(self, lifetime: float, timings: RunTimings = None):
+        self.backend = get_connection(settings.MAILING_EMAIL_BACKEND, fail_silently=False)
+        self.lifetime = lifetime
+        self.timings = RunTimings() if timings is None else timings
+        self.opened_at = None
+
+    @property
+    def expired(self) -> bool:
+        """Соединение не открыто или прожило дольше `lifetime` секунд."""
+        return self.opened_at is None or time.monotonic() - self.opened_at >= self.lifetime
+
+    def open(self):
+        with self.timings.measure("connect"):
+            self.backend.open()
+        self.opened_at = time.monotonic()
+
+    def close(self):
+        try:
+            self.backend.close()
+        except (smtplib.SMTPException, OSError):
+            # Сервер мог уже закрыть сессию — нам важно лишь освободить сокет.
+            pass
+        self.opened_at = None
+
+    def reconnect(self):
+        self.close()
+        self.open()
+
+    def send(self, message) -> int:
+        """Отправляет одно письмо по открытому соединению.
+
+        При разрыве соединения сервером письмо отправляется повторно
+        один раз по новому соединению. Остальные ошибки пробрасываются.
+        """
+        if self.expired:
+            self.reconnect()
+        try:
+            with self.timings.measure("send"):
+                return self.backend.send_messages([message])
+        except RECONNECT_ERRORS:
+            self.reconnect()
+            with self.timings.measure("send"):
+                return self.backend.send_messages([message])
+
+
+class SMTPConnectionPool:
+    """Небольшой пул SMTP-соединений на время одного запуска рассылки.
+
+    Письма отправляются пачками по `batch_size` штук через одно соединение,
+    после чего пул переходит к следующему соединению по кругу. Соединения
+    открываются лениво и живут не дольше `lifetime` секунд.
+
+    Каждое письмо отправляется отдельным вызовом `send_messages`, чтобы
+    результат (успех или ошибка) фиксировался для каждого получателя.
+    """
+
+    def __init__(self, size: int = None, batch_size: int = None, lifetime: float = None,
+                 timings: RunTimings = None):
+        size = size or settings.MAILING_SMTP_POOL_SIZE
+        self.batch_size = batch_size or settings.MAILING_SMTP_BATCH_SIZE
+        lifetime = lifetime or settings.MAILING_SMTP_CONNECTION_LIFETIME
+        self.connections = [PooledConnection(lifetime, timings) for _ in range(size)]
+        self._sent_in_batch = 0
+        self._current = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _next_connection(self) -> PooledConnection:
+        if self._sent_in_batch >= self.batch_size:
+            self._sent_in_batch = 0
+            self._current = (self._current + 1) % len(self.connections)
+        self._sent_in_batch += 1
+        return self.connections[self._current]
+
+    def send(self, message) -> int:
+        """Отправляет письмо через очередное соединение пула.
+
+        Возвращает количество отправленных писем (0 или 1).
+        """
+        return self._next_connection().send(message)
+
+    def close(self):
+        for conn in self.connections:
+            conn.close()
+
+
+def smtp_reply_codes(error: Exception) -> list:
+    """Коды ответа SMTP-сервера, содержащиеся в исключении.
+
+    Понимает исключения `smtplib` и `aiosmtplib`, в том числе отказы
+    по нескольким получателям сразу.
+    """
+    recipients = getattr(error, "recipients", None)
+    if isinstance(recipients, dict):
+        return [code for code, _ in recipients.values()]
+    if isinstance(recipients, list):
+        return [getattr(refused, "code", None) for refused in recipients]
+    code = getattr(error, "smtp_code", None) or getattr(error, "code", None)
+    return [code] if isinstance(code, int) else []
+
+
+def is_transient_error(error: Exception) -> bool:
+    """Временная ли ошибка отправки, то есть есть ли смысл повторить позже.
+
+    Временными считаются ответы сервера 4xx, обрывы соединения и таймауты.
+    Ответы 5xx и прочие ошибки — окончательные.
+    """
+    codes = [code for code in smtp_reply_codes(error) if code]
+    if codes:
+        return all(400 <= code < 500 for code in codes)
+    # smtplib.SMTPException — тоже OSError, сюда попадают разрывы соединения без кода.
+    return isinstance(error, OSError)
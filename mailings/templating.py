@@ -0,0 +1,64 @@
+import re
+
+# Поля клиента, доступные в теме и тексте письма: {{ full_name }}, {{ email }}.
+TEMPLATE_FIELDS = ("full_name", "email")
+
+PLACEHOLDER_RE = re.compile(r"{{\s*(\w+)\s*}}")
+
+
+def unknown_placeholders(text: str) -> list:
+    """Подстановки в `text`, которых нет среди `TEMPLATE_FIELDS`."""
+    return sorted({name for name in PLACEHOLDER_RE.findall(text) if name not in TEMPLATE_FIELDS})
+
+
+class CompiledTemplate:
+    """Текст письма, разобранный на статические куски и подстановки.
+
+    Разбор выполняется один раз, а `render` лишь склеивает строки.
+    Неизвестные подстановки остаются в тексте как есть.
+
+    Атрибуты:
+        static (list): статические куски; их на один больше, чем полей.
+        fields (list): имена полей между соседними кусками.
+    """
+
+    def __init__(self, text: str):
+        self.static = [""]
+        self.fields = []
+        pos = 0
+        for match in PLACEHOLDER_RE.finditer(text):
+            self.static[-1] += text[pos:match.start()]
+            if match.group(1) in TEMPLATE_FIELDS:
+                self.fields.append(match.group(1))
+                self.static.append("")
+            else:
+                self.static[-1] += match.group(0)
+            pos = match.end()
+        self.static[-1] += text[pos:]
+
+    @property
+    def is_static(self) -> bool:
+        """В тексте нет подстановок — он одинаков для всех получателей."""
+        return not self.fields
+
+    def render(self, context: dict) -> str:
+        """Подставляет значения `context` (поле → строка)."""
+        if not self.fields:
+            return self.static[0]
+        parts = [self.static[0]]
+        for field, chunk in zip(self.fields, self.static[1:]):
+            parts.append(context[field])
+            parts.append(chunk)
+        return "".join(parts)
+
+
+def template_context(recipient) -> dict:
+    """Значения подстановок для получателя (`Client` или строки `recipient_rows`).
+
+    Переводы строк в значениях заменяются пробелами, чтобы значение
+    не ломало заголовки и разметку письма.
+    """
+    return {
+        field: " ".join(str(getattr(recipient, field, "") or "").splitlines())
+        for field in TEMPLATE_FIELDS
+    }
@@ -0,0 +1,531 @@
+import email
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .counters import recount
+from .estimates import estimate_count, query_estimate
+from .leases import LeaseLost, MailingBusy, MailingLease
+from .mime import PreparedMessage
+from .models import Attempt, Client, DeliveryRetry, Mailing, Message, SendJob
+from .rollups import roll_up
+from .services import (
+    claim_next_job, enqueue_mailing, run_job, send_mailing_now, send_mailing_sharded, send_mailing_threaded,
+)
+from .services.jobs import stale_jobs
+from .services.sharded import shard_ranges
+from .sink import SMTPSink
+from .throttling import DomainThrottle, throttled
+
+
+def make_owner(email="owner@example.com"):
+    return get_user_model().objects.create_user(email=email, username=email, password="x")
+
+
+def make_clients(owner, count, domain="example.com"):
+    return Client.objects.bulk_create(
+        Client(email=f"client{i}@{domain}", full_name=f"Клиент {i}", owner=owner) for i in range(count)
+    )
+
+
+def make_mailing(owner, clients, **kwargs):
+    now = timezone.now()
+    message = Message.objects.create(topic="Тема", body="Здравствуйте, {{ full_name }}!", owner=owner)
+    mailing = Mailing.objects.create(
+        start_time=now - timedelta(minutes=1), end_time=now + timedelta(hours=1),
+        message=message, owner=owner, **kwargs,
+    )
+    mailing.clients.set(clients)
+    return mailing
+
+
+class SinkMixin:
+    """Отправка через локальную SMTP-заглушку (`mailings/sink.py`).
+
+    Буфер попыток сбрасывается только по размеру и при закрытии:
+    фоновый сброс писал бы из другого потока мимо транзакции теста.
+    """
+    sink_options = {}
+
+    def setUp(self):
+        super().setUp()
+        self.sink = SMTPSink(seed=1, **self.sink_options)
+        self.sink.__enter__()
+        self.addCleanup(self.sink.__exit__, None, None, None)
+        smtp = override_settings(
+            MAILING_EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+            EMAIL_HOST=self.sink.host,
+            EMAIL_PORT=self.sink.port,
+            EMAIL_HOST_USER="",
+            EMAIL_HOST_PASSWORD="",
+            EMAIL_USE_TLS=False,
+            EMAIL_USE_SSL=False,
+            DEFAULT_FROM_EMAIL="test@localhost",
+            MAILING_DOMAIN_RATES={},
+            MAILING_DEFAULT_DOMAIN_RATE=None,
+            MAILING_ATTEMPT_FLUSH_INTERVAL=3600,
+        )
+        smtp.enable()
+        self.addCleanup(smtp.disable)
+
+
+class SendingTests(SinkMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.owner = make_owner()
+        self.clients = make_clients(self.owner, 12)
+        self.mailing = make_mailing(self.owner, self.clients)
+
+    def assertDelivered(self, stats, count):
+        self.mailing.refresh_from_db()
+        self.assertEqual(stats, {"total": count, "ok": count, "failed": 0})
+        self.assertEqual(self.sink.stats["messages"], count)
+        self.assertEqual(Attempt.objects.filter(mailing=self.mailing, status=Attempt.Status.SUCCEEDED).count(), count)
+        self.assertEqual(self.mailing.status, Mailing.Status.FINISHED)
+        self.assertEqual(self.mailing.lease_owner, "")
+
+    def test_sequential_delivery(self):
+        stats = send_mailing_now(self.mailing)
+        self.assertDelivered(stats, 12)
+        self.assertEqual(self.mailing.succeeded_count, 12)
+        self.assertEqual(
+            set(Attempt.objects.filter(mailing=self.mailing).values_list("client_id", flat=True)),
+            {client.pk for client in self.clients},
+        )
+
+    def test_threaded_delivery(self):
+        stats = send_mailing_threaded(self.mailing, concurrency=4)
+        self.assertDelivered(stats, 12)
+        self.assertEqual(self.mailing.succeeded_count, 12)
+
+    def test_resume_skips_delivered_clients(self):
+        started_at = timezone.now() - timedelta(minutes=5)
+        Mailing.objects.filter(pk=self.mailing.pk).update(status=Mailing.Status.RUNNING, started_at=started_at)
+        delivered = self.clients[:5]
+        Attempt.objects.bulk_create(
+            Attempt(mailing=self.mailing, client=client, status=Attempt.Status.SUCCEEDED, reply="OK",
+                    date=started_at + timedelta(minutes=1))
+            for client in delivered
+        )
+        # Успех прошлого запуска докачку не останавливает.
+        Attempt.objects.create(
+            mailing=self.mailing, client=self.clients[5], status=Attempt.Status.SUCCEEDED, reply="OK",
+            date=started_at - timedelta(days=1),
+        )
+
+        stats = send_mailing_now(self.mailing, resume=True)
+
+        self.assertEqual(stats, {"total": 7, "ok": 7, "failed": 0})
+        self.assertEqual(self.sink.stats["messages"], 7)
+        self.assertFalse(
+            Attempt.objects.filter(mailing=self.mailing, client__in=delivered, date__gt=started_at + timedelta(minutes=1))
+            .exists()
+        )
+
+    def test_busy_mailing_is_not_sent(self):
+        Mailing.objects.filter(pk=self.mailing.pk).update(
+            lease_owner="other", lease_expires_at=timezone.now() + timedelta(minutes=1),
+        )
+        with self.assertRaises(MailingBusy):
+            send_mailing_now(self.mailing)
+        self.assertEqual(self.sink.stats["messages"], 0)
+
+
+class SendingErrorsTests(SinkMixin, TestCase):
+    sink_options = {"temp_error_rate": 1.0}
+
+    def test_temporary_errors_schedule_retries(self):
+        owner = make_owner()
+        clients = make_clients(owner, 3)
+        mailing = make_mailing(owner, clients)
+
+        stats = send_mailing_now(mailing)
+
+        mailing.refresh_from_db()
+        self.assertEqual(stats, {"total": 3, "ok": 0, "failed": 3})
+        self.assertEqual(mailing.failed_count, 3)
+        self.assertEqual(Attempt.objects.filter(mailing=mailing, status=Attempt.Status.FAILED).count(), 3)
+        self.assertEqual(
+            set(DeliveryRetry.objects.filter(mailing=mailing, retries=1).values_list("client_id", flat=True)),
+            {client.pk for client in clients},
+        )
+
+
+class ShardRangesTests(TestCase):
+
+    def test_ranges_cover_every_client_once(self):
+        owner = make_owner()
+        mailing = make_mailing(owner, make_clients(owner, 10))
+        ranges = shard_ranges(mailing, 3)
+        self.assertEqual(len(ranges), 3)
+        self.assertIsNone(ranges[0][0])
+        self.assertIsNone(ranges[-1][1])
+        sizes = []
+        for lo, hi in ranges:
+            clients = mailing.clients.all()
+            if lo is not None:
+                clients = clients.filter(pk__gte=lo)
+            if hi is not None:
+                clients = clients.filter(pk__lt=hi)
+            sizes.append(clients.count())
+        self.assertEqual(sum(sizes), 10)
+        self.assertLessEqual(max(sizes) - min(sizes), 1)
+
+    def test_no_more_shards_than_clients(self):
+        owner = make_owner()
+        mailing = make_mailing(owner, make_clients(owner, 2))
+        self.assertEqual(len(shard_ranges(mailing, 5)), 2)
+
+
+@skipUnless(connection.vendor == "postgresql", "шарды — отдельные процессы, им нужна общая БД")
+class ShardedSendingTests(SinkMixin, TransactionTestCase):
+
+    def test_sharded_delivery(self):
+        owner = make_owner()
+        clients = make_clients(owner, 20)
+        mailing = make_mailing(owner, clients)
+
+        stats = send_mailing_sharded(mailing, 3, concurrency=2)
+
+        mailing.refresh_from_db()
+        self.assertEqual(stats, {"total": 20, "ok": 20, "failed": 0})
+        self.assertEqual(self.sink.stats["messages"], 20)
+        self.assertEqual(mailing.status, Mailing.Status.FINISHED)
+        self.assertEqual(mailing.succeeded_count, 20)
+        self.assertEqual(
+            sorted(Attempt.objects.filter(mailing=mailing).values_list("client_id", flat=True)),
+            sorted(client.pk for client in clients),
+        )
+
+
+class ThrottlingTests(TestCase):
+
+    def test_slow_domain_does_not_block_others(self):
+        # Окно целиком занято медленным доменом: остальные домены всё равно уходят сразу.
+        recipients = [SimpleNamespace(email=f"u{i}@slow.example") for i in range(30)]
+        recipients += [SimpleNamespace(email=f"u{i}@fast.example") for i in range(10)]
+        throttle = DomainThrottle(rates={"slow.example": (1, 1)}, default_rate=None, window=5, max_buffer=100)
+        sent = []
+        for recipient in throttled(recipients, throttle):
+            sent.append(recipient.email.partition("@")[2])
+            if len(sent) == 11:
+                break
+        self.assertEqual(sent, ["slow.example"] + ["fast.example"] * 10)
+
+    def test_buffer_is_capped(self):
+        recipients = [SimpleNamespace(email=f"u{i}@slow.example") for i in range(50)]
+        throttle = DomainThrottle(rates={"slow.example": (1000, 1)}, default_rate=None, window=5, max_buffer=8)
+        buffered = []
+        for _ in throttled(recipients, throttle):
+            buffered.append(len(throttle))
+        self.assertEqual(len(buffered), 50)
+        self.assertLessEqual(max(buffered), 8)
+
+
+class SendJobTests(TestCase):
+
+    def setUp(self):
+        self.owner = make_owner()
+        self.mailing = make_mailing(self.owner, make_clients(self.owner, 2))
+
+    def test_enqueue_keeps_one_active_job(self):
+        job, created = enqueue_mailing(self.mailing)
+        again, created_again = enqueue_mailing(self.mailing)
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(again.pk, job.pk)
+
+    def test_claim_next_job(self):
+        first, _ = enqueue_mailing(self.mailing)
+        other = make_mailing(self.owner, [])
+        second, _ = enqueue_mailing(other)
+
+        job = claim_next_job("worker-1")
+        self.assertEqual(job.pk, first.pk)
+        self.assertEqual(job.status, SendJob.Status.RUNNING)
+        self.assertEqual(job.worker, "worker-1")
+        self.assertFalse(job.reclaimed)
+        self.assertEqual(claim_next_job("worker-2").pk, second.pk)
+        self.assertIsNone(claim_next_job("worker-3"))
+
+    @override_settings(MAILING_LEASE_TTL=60)
+    def test_stale_job_is_reclaimed(self):
+        job, _ = enqueue_mailing(self.mailing)
+        claim_next_job("worker-1")
+        self.assertFalse(stale_jobs().exists())
+
+        SendJob.objects.filter(pk=job.pk).update(started_at=timezone.now() - timedelta(minutes=5))
+        Mailing.objects.filter(pk=self.mailing.pk).update(
+            lease_owner="worker-1", lease_expires_at=timezone.now() + timedelta(seconds=30),
+        )
+        # Аренда ещё действует — воркер жив.
+        self.assertFalse(stale_jobs().exists())
+
+        Mailing.objects.filter(pk=self.mailing.pk).update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(list(stale_jobs()), [job])
+        reclaimed = claim_next_job("worker-2")
+        self.assertEqual(reclaimed.pk, job.pk)
+        self.assertTrue(reclaimed.reclaimed)
+        self.assertEqual(reclaimed.worker, "worker-2")
+
+    def test_finished_mailing_job_is_not_stale(self):
+        job, _ = enqueue_mailing(self.mailing)
+        claim_next_job("worker-1")
+        SendJob.objects.filter(pk=job.pk).update(started_at=timezone.now() - timedelta(hours=1))
+        Mailing.objects.filter(pk=self.mailing.pk).update(status=Mailing.Status.FINISHED)
+        self.assertFalse(stale_jobs().exists())
+
+    def test_job_after_mailing_end_is_skipped(self):
+        job, _ = enqueue_mailing(self.mailing)
+        Mailing.objects.filter(pk=self.mailing.pk).update(end_time=timezone.now() - timedelta(minutes=1))
+        job = run_job(claim_next_job("worker-1"))
+        self.assertEqual(job.status, SendJob.Status.SKIPPED)
+        self.assertFalse(Attempt.objects.exists())
+
+
+class MailingLeaseTests(TestCase):
+
+    def setUp(self):
+        owner = make_owner()
+        self.mailing = make_mailing(owner, [])
+
+    def test_only_one_holder(self):
+        lease = MailingLease(self.mailing)
+        self.assertTrue(lease.acquire())
+        self.assertFalse(lease.reclaimed)
+
+        rival = MailingLease(self.mailing)
+        self.assertFalse(rival.acquire())
+        self.assertEqual(rival.holder, lease.owner)
+
+        lease.release()
+        self.assertTrue(rival.acquire())
+
+    def test_renew_extends_lease(self):
+        lease = MailingLease(self.mailing, ttl=60)
+        lease.acquire()
+        Mailing.objects.filter(pk=self.mailing.pk).update(lease_expires_at=timezone.now() + timedelta(seconds=1))
+        self.assertTrue(lease.renew())
+        self.mailing.refresh_from_db()
+        self.assertGreater(self.mailing.lease_expires_at, timezone.now() + timedelta(seconds=50))
+        lease.check()
+
+    def test_lost_lease(self):
+        lease = MailingLease(self.mailing)
+        lease.acquire()
+        Mailing.objects.filter(pk=self.mailing.pk).update(lease_owner="thief")
+        self.assertFalse(lease.renew())
+        self.assertTrue(lease.lost)
+        with self.assertRaises(LeaseLost):
+            lease.check()
+        # Чужую аренду освобождение не трогает.
+        lease.release()
+        self.mailing.refresh_from_db()
+        self.assertEqual(self.mailing.lease_owner, "thief")
+
+    def test_expired_lease_is_reclaimed(self):
+        Mailing.objects.filter(pk=self.mailing.pk).update(
+            lease_owner="crashed", lease_expires_at=timezone.now() - timedelta(seconds=1),
+        )
+        lease = MailingLease(self.mailing)
+        self.assertTrue(lease.acquire())
+        self.assertTrue(lease.reclaimed)
+
+    def test_context_manager_raises_busy(self):
+        with MailingLease(self.mailing):
+            with self.assertRaises(MailingBusy):
+                with MailingLease(self.mailing):
+                    pass
+        self.mailing.refresh_from_db()
+        self.assertEqual(self.mailing.lease_owner, "")
+
+
+class PreparedMessageTests(TestCase):
+
+    def recipient(self, full_name="Иван Петров", email_address="ivan@example.com"):
+        return SimpleNamespace(id=1, email=email_address, full_name=full_name)
+
+    def parse(self, message):
+        return email.message_from_bytes(message.message().as_bytes(linesep="\r\n"))
+
+    def test_placeholders_are_spliced_into_body(self):
+        prepared = PreparedMessage("Письмо для {{ full_name }}", "Здравствуйте, {{ full_name }}!\nАдрес: {{ email }}.")
+        self.assertIsNotNone(prepared.chunks("\r\n"))
+
+        for recipient in (self.recipient(), self.recipient("Анна", "anna@example.com")):
+            parsed = self.parse(prepared.to(recipient))
+            self.assertEqual(parsed["To"], recipient.email)
+            self.assertEqual(str(email.header.make_header(email.header.decode_header(parsed["Subject"]))),
+                             f"Письмо для {recipient.full_name}")
+            self.assertEqual(
+                parsed.get_payload(decode=True).decode(parsed.get_content_charset()),
+                f"Здравствуйте, {recipient.full_name}!\r\nАдрес: {recipient.email}.",
+            )
+            self.assertIsNotNone(parsed["Message-ID"])
+            self.assertIsNotNone(parsed["Date"])
+
+    def test_static_message(self):
+        prepared = PreparedMessage("Новости", "Одинаковый текст для всех.")
+        parsed = self.parse(prepared.to(self.recipient()))
+        self.assertEqual(parsed.get_payload(decode=True).decode("utf-8"), "Одинаковый текст для всех.")
+
+    def test_long_value_falls_back_to_full_encoding(self):
+        prepared = PreparedMessage("Тема", "Имя: {{ full_name }}")
+        name = "Я" * 1000
+        data = prepared.to(self.recipient(full_name=name)).message().as_bytes(linesep="\r\n")
+        self.assertTrue(all(len(line) <= 998 for line in data.split(b"\r\n")))
+        parsed = email.message_from_bytes(data)
+        self.assertEqual(parsed.get_payload(decode=True).decode("utf-8"), f"Имя: {name}")
+
+    def test_newlines_in_values_do_not_break_headers(self):
+        prepared = PreparedMessage("Для {{ full_name }}", "Текст")
+        parsed = self.parse(prepared.to(self.recipient(full_name="Иван\r\nBcc: evil@example.com")))
+        self.assertIsNone(parsed["Bcc"])
+
+
+class CounterTests(TestCase):
+
+    def setUp(self):
+        self.owner = make_owner()
+        self.clients = make_clients(self.owner, 5)
+        self.mailing = make_mailing(self.owner, [])
+
+    def count(self):
+        self.mailing.refresh_from_db()
+        return self.mailing.recipients_count
+
+    def test_recipient_changes(self):
+        self.mailing.clients.add(*self.clients)
+        self.assertEqual(self.count(), 5)
+        # Повторное добавление ничего не меняет.
+        self.mailing.clients.add(self.clients[0])
+        self.assertEqual(self.count(), 5)
+        self.mailing.clients.remove(self.clients[0], self.clients[1])
+        self.assertEqual(self.count(), 3)
+        self.clients[0].mailings.add(self.mailing)
+        self.assertEqual(self.count(), 4)
+        self.clients[0].mailings.remove(self.mailing)
+        self.assertEqual(self.count(), 3)
+        self.mailing.clients.clear()
+        self.assertEqual(self.count(), 0)
+
+    def test_client_delete(self):
+        self.mailing.clients.add(*self.clients)
+        self.clients[0].delete()
+        self.assertEqual(self.count(), 4)
+        Client.objects.filter(pk__in=[self.clients[1].pk, self.clients[2].pk]).delete()
+        self.assertEqual(self.count(), 2)
+
+    def test_recount_fixes_drift(self):
+        self.mailing.clients.add(*self.clients)
+        Attempt.objects.create(mailing=self.mailing, client=self.clients[0], status=Attempt.Status.SUCCEEDED)
+        Attempt.objects.create(mailing=self.mailing, client=self.clients[1], status=Attempt.Status.FAILED)
+        Mailing.objects.filter(pk=self.mailing.pk).update(recipients_count=42, succeeded_count=0, failed_count=7)
+
+        self.assertEqual(recount(), 1)
+        self.mailing.refresh_from_db()
+        self.assertEqual(
+            (self.mailing.recipients_count, self.mailing.succeeded_count, self.mailing.failed_count), (5, 1, 1),
+        )
+        self.assertEqual(recount(), 0)
+
+    def test_recount_keeps_rolled_up_attempts(self):
+        self.mailing.clients.add(*self.clients)
+        date = timezone.now() - timedelta(hours=2)
+        for client in self.clients[:3]:
+            Attempt.objects.create(mailing=self.mailing, client=client, status=Attempt.Status.SUCCEEDED, date=date)
+        Mailing.objects.filter(pk=self.mailing.pk).update(succeeded_count=3)
+        roll_up(lag=0)
+        # Попытки ушли в архив, а сводки их помнят.
+        Attempt.objects.all().delete()
+
+        self.assertEqual(recount(), 0)
+        self.mailing.refresh_from_db()
+        self.assertEqual(self.mailing.succeeded_count, 3)
+
+
+class KeysetPaginationTests(TestCase):
+
+    def setUp(self):
+        self.owner = make_owner()
+        # Одинаковые имена: порядок внутри них задаёт второе поле ключа, id.
+        Client.objects.bulk_create(
+            Client(email=f"client{i}@example.com", full_name=f"Клиент {i % 7}", owner=self.owner) for i in range(120)
+        )
+        self.client.force_login(self.owner)
+        self.url = reverse("mailings:client_list")
+        self.expected = list(Client.objects.order_by("full_name", "id").values_list("pk", flat=True))
+
+    def page(self, query=""):
+        response = self.client.get(f"{self.url}?{query}")
+        self.assertEqual(response.status_code, 200)
+        return response.context["page_obj"]
+
+    def test_forward_and_back(self):
+        pages = [self.page()]
+        while pages[-1].has_next:
+            pages.append(self.page(pages[-1].next_query))
+        self.assertEqual([len(page) for page in pages], [50, 50, 20])
+        self.assertEqual([client.pk for page in pages for client in page], self.expected)
+        self.assertFalse(pages[0].has_previous)
+
+        previous = self.page(pages[-1].previous_query)
+        self.assertEqual([client.pk for client in previous], [client.pk for client in pages[1]])
+        self.assertTrue(previous.has_previous)
+        first = self.page(previous.previous_query)
+        self.assertEqual([client.pk for client in first], self.expected[:50])
+        self.assertFalse(first.has_previous)
+
+    def test_total_count(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.context["total_count"], (120, True))
+
+    def test_bad_cursor(self):
+        self.assertEqual(self.client.get(f"{self.url}?after=not-a-cursor").status_code, 404)
+
+
+class SendMailingCommandTests(TestCase):
+
+    @override_settings(MAILING_EMAIL_BACKEND="mailings.backends.MboxBackend")
+    def test_asyncio_refuses_non_smtp_backend(self):
+        owner = make_owner()
+        mailing = make_mailing(owner, make_clients(owner, 2))
+        with self.assertRaisesMessage(CommandError, "только по SMTP"):
+            call_command("send_mailing", mailing.pk, "--asyncio")
+        self.assertFalse(Attempt.objects.exists())
+
+
+class EstimatesTests(TestCase):
+
+    def setUp(self):
+        self.owner = make_owner()
+        make_clients(self.owner, 5)
+
+    def test_small_selection_is_counted_exactly(self):
+        estimate = estimate_count(Client.objects.filter(owner=self.owner), threshold=1000)
+        self.assertEqual(estimate, (5, True))
+        self.assertEqual(str(estimate), "5")
+
+    @skipUnless(connection.vendor != "postgresql", "проверка поведения вне PostgreSQL")
+    def test_no_plan_estimate_outside_postgresql(self):
+        self.assertIsNone(query_estimate(Client.objects.filter(owner=self.owner)))
+
+    @skipUnless(connection.vendor == "postgresql", "оценка по плану есть только в PostgreSQL")
+    def test_query_estimate_reads_plan_rows(self):
+        value = query_estimate(Client.objects.filter(owner=self.owner))
+        self.assertIsInstance(value, int)
+        self.assertGreaterEqual(value, 1)
+
+    @skipUnless(connection.vendor == "postgresql", "оценка по плану есть только в PostgreSQL")
+    def test_large_filtered_selection_is_estimated(self):
+        estimate = estimate_count(Client.objects.filter(owner=self.owner), threshold=0)
+        self.assertFalse(estimate.exact)
+        self.assertEqual(str(estimate), f"≈ {estimate.value}")
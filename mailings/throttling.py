@@ -0,0 +1,173 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+
+from django.conf import settings
+
+
+def domain_of(email: str) -> str:
+    """Домен почтового адреса в нижнем регистре."""
+    return email.rpartition("@")[2].lower()
+
+
+class TokenBucket:
+    """Маркерная корзина: `rate` писем в секунду с запасом `burst`."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def wait_time(self, now: float) -> float:
+        """Сколько секунд ждать до появления маркера (0 — маркер есть)."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self):
+        self.tokens -= 1
+
+
+class DomainThrottle:
+    """Чередует получателей по доменам и выдаёт их с учётом лимитов домена.
+
+    Получатели раскладываются по очередям доменов, а выдаются по кругу:
+    на каждом шаге берётся следующий домен, у которого есть маркер.
+    Домен, упёршийся в свой лимит, пропускается и не задерживает остальные.
+
+    Лимиты берутся из `MAILING_DOMAIN_RATES` (домен → (писем в секунду,
+    запас)); для прочих доменов — `MAILING_DEFAULT_DOMAIN_RATE`
+    (None — без ограничения).
+
+    Вперёд читается `window` получателей; если все домены в окне ждут
+    маркеров, чтение продолжается, но не дальше `max_buffer` получателей.
+    """
+
+    def __init__(self, rates: dict = None, default_rate: tuple = None, window: int = None, max_buffer: int = None):
+        self.rates = settings.MAILING_DOMAIN_RATES if rates is None else rates
+        self.default_rate = default_rate or settings.MAILING_DEFAULT_DOMAIN_RATE
+        self.window = window or settings.MAILING_THROTTLE_WINDOW
+        self.max_buffer = max(self.window, max_buffer or settings.MAILING_THROTTLE_MAX_BUFFER)
+        self._queues = OrderedDict()
+        self._buckets = {}
+        self._buffered = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.rates) or self.default_rate is not None
+
+    def __len__(self):
+        return self._buffered
+
+    def _bucket(self, domain: str):
+        if domain not in self._buckets:
+            rate = self.rates.get(domain, self.default_rate)
+            self._buckets[domain] = TokenBucket(*rate) if rate else None
+        return self._buckets[domain]
+
+    def push(self, recipient):
+        """Добавляет получателя (объект с атрибутом `email`) в очередь его домена."""
+        self._queues.setdefault(domain_of(recipient.email), deque()).append(recipient)
+        self._buffered += 1
+
+    def poll(self) -> tuple:
+        """Выдаёт следующего получателя, которому можно отправить письмо.
+
+        Возвращает:
+            tuple: (получатель, 0), если отправлять можно сейчас;
+            (None, секунды) — сколько ждать до ближайшего маркера;
+            (None, None) — очереди пусты.
+        """
+        if not self._queues:
+            return None, None
+        now = time.monotonic()
+        min_wait = None
+        for _ in range(len(self._queues)):
+            domain, queue = next(iter(self._queues.items()))
+            self._queues.move_to_end(domain)
+            bucket = self._bucket(domain)
+            wait = bucket.wait_time(now) if bucket else 0
+            if wait == 0:
+                if bucket:
+                    bucket.consume()
+                recipient = queue.popleft()
+                self._buffered -= 1
+                if not queue:
+                    del self._queues[domain]
+                return recipient, 0
+            min_wait = wait if min_wait is None else min(min_wait, wait)
+        return None, min_wait
+
+
+def throttled(recipients, throttle: DomainThrottle = None):
+    """Выдаёт получателей из итератора `recipients` с учётом лимитов доменов.
+
+    Вперёд читается `MAILING_THROTTLE_WINDOW` получателей. Если окно
+    целиком занято доменами, которые ждут маркеров (например, одним
+    медленным доменом), чтение продолжается, чтобы письма уходили
+    получателям других доменов; память ограничена `MAILING_THROTTLE_MAX_BUFFER`
+    получателями. Если лимиты не заданы, получатели возвращаются как есть.
+    """
+    if throttle is None:
+        throttle = DomainThrottle()
+    if not throttle.enabled:
+        yield from recipients
+        return
+    source = iter(recipients)
+    exhausted = False
+    while True:
+        while not exhausted and len(throttle) < throttle.window:
+            recipient = next(source, None)
+            if recipient is None:
+                exhausted = True
+            else:
+                throttle.push(recipient)
+        recipient, wait = throttle.poll()
+        if recipient is not None:
+            yield recipient
+        elif wait is None:
+            return
+        elif not exhausted and len(throttle) < throttle.max_buffer:
+            # Все домены в буфере ждут маркеров: ищем дальше получателя из свободного домена.
+            recipient = next(source, None)
+            if recipient is None:
+                exhausted = True
+            else:
+                throttle.push(recipient)
+        else:
+            time.sleep(wait)
+
+
+async def athrottled(recipients, throttle: DomainThrottle = None):
+    """Асинхронный вариант `throttled` для асинхронного итератора получателей."""
+    if throttle is None:
+        throttle = DomainThrottle()
+    if not throttle.enabled:
+        async for recipient in recipients:
+            yield recipient
+        return
+    source = aiter(recipients)
+    exhausted = False
+    while True:
+        while not exhausted and len(throttle) < throttle.window:
+            recipient = await anext(source, None)
+            if recipient is None:
+                exhausted = True
+            else:
+                throttle.push(recipient)
+        recipient, wait = throttle.poll()
+        if recipient is not None:
+            yield recipient
+        elif wait is None:
+            return
+        elif not exhausted and len(throttle) < throttle.max_buffer:
+            recipient = await anext(source, None)
+            if recipient is None:
+                exhausted = True
+            else:
+                throttle.push(recipient)
+        else:
+            await asyncio.sleep(wait)
@@ -0,0 +1,144 @@
+import bisect
+import threading
+import time
+
+# Фазы запуска рассылки в порядке вывода.
+PHASES = {
+    "fetch": "Чтение получателей",
+    "connect": "Подключение к SMTP",
+    "send": "Передача письма",
+    "record": "Запись попыток",
+}
+
+# Верхние границы корзин гистограммы, в секундах; последняя корзина — всё, что дольше.
+BUCKETS = (0.0001, 0.001, 0.01, 0.1, 1.0)
+BUCKET_LABELS = ("<0,1 мс", "0,1–1 мс", "1–10 мс", "10–100 мс", "0,1–1 с", "≥1 с")
+
+_DONE = object()
+
+
+def _empty_stat() -> dict:
+    return {"count": 0, "total": 0.0, "max": 0.0, "buckets": [0] * len(BUCKET_LABELS)}
+
+
+class _Timer:
+    __slots__ = ("timings", "phase", "started")
+
+    def __init__(self, timings, phase: str):
+        self.timings = timings
+        self.phase = phase
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.timings.add(self.phase, time.perf_counter() - self.started)
+
+
+class RunTimings:
+    """Замеры времени по фазам одного запуска рассылки.
+
+    Для каждой фазы копятся число вызовов, суммарное и максимальное время
+    и гистограмма длительностей по корзинам `BUCKETS`. Время берётся
+    с монотонных часов (`time.perf_counter`), замер стоит доли микросекунды.
+    Методы потокобезопасны: фазу «Передача письма» пишут рабочие потоки.
+
+    Сохраняется в `Mailing.run_timings` в виде `as_dict()`.
+    """
+
+    bucket_labels = BUCKET_LABELS
+
+    def __init__(self):
+        self.phases = {}
+        self.elapsed = 0.0
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, phase: str, seconds: float):
+        """Учитывает один вызов фазы `phase` длительностью `seconds`."""
+        bucket = bisect.bisect_left(BUCKETS, seconds)
+        with self._lock:
+            stat = self.phases.get(phase)
+            if stat is None:
+                stat = self.phases[phase] = _empty_stat()
+            stat["count"] += 1
+            stat["total"] += seconds
+            if seconds > stat["max"]:
+                stat["max"] = seconds
+            stat["buckets"][bucket] += 1
+
+    def measure(self, phase: str) -> _Timer:
+        """Контекстный менеджер, замеряющий блок кода как вызов фазы."""
+        return _Timer(self, phase)
+
+    def timed_iter(self, phase: str, iterable):
+        """Итератор, замеряющий получение каждого элемента `iterable`."""
+        iterator = iter(iterable)
+        while True:
+            started = time.perf_counter()
+            item = next(iterator, _DONE)
+            self.add(phase, time.perf_counter() - started)
+            if item is _DONE:
+                return
+            yield item
+
+    async def atimed_iter(self, phase: str, iterable):
+        """Асинхронный вариант `timed_iter`."""
+        iterator = aiter(iterable)
+        while True:
+            started = time.perf_counter()
+            item = await anext(iterator, _DONE)
+            self.add(phase, time.perf_counter() - started)
+            if item is _DONE:
+                return
+            yield item
+
+    def merge(self, data: dict):
+        """Добавляет замеры другого процесса (словарь `as_dict()`)."""
+        with self._lock:
+            for phase, other in data.get("phases", {}).items():
+                stat = self.phases.setdefault(phase, _empty_stat())
+                stat["count"] += other["count"]
+                stat["total"] += other["total"]
+                stat["max"] = max(stat["max"], other["max"])
+                stat["buckets"] = [a + b for a, b in zip(stat["buckets"], other["buckets"])]
+
+    def finish(self):
+        """Фиксирует общую длительность запуска."""
+        self.elapsed = time.perf_counter() - self._started
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "elapsed": self.elapsed,
+                "phases": {phase: dict(stat, buckets=list(stat["buckets"])) for phase, stat in self.phases.items()},
+            }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RunTimings":
+        timings = cls()
+        timings.elapsed = (data or {}).get("elapsed", 0.0)
+        timings.merge(data or {})
+        return timings
+
+    def rows(self) -> list:
+        """Строки для вывода: фаза, вызовы, время и гистограмма.
+
+        Возвращает:
+            list: словари с ключами label, count, total (с), avg_ms, max_ms
+            и buckets (число вызовов в каждой корзине `BUCKET_LABELS`).
+        """
+        rows = []
+        order = [phase for phase in PHASES if phase in self.phases]
+        order += sorted(set(self.phases) - set(PHASES))
+        for phase in order:
+            stat = self.phases[phase]
+            rows.append({
+                "label": PHASES.get(phase, phase),
+                "count": stat["count"],
+                "total": stat["total"],
+                "avg_ms": stat["total"] / stat["count"] * 1000 if stat["count"] else 0.0,
+                "max_ms": stat["max"] * 1000,
+                "buckets": stat["buckets"],
+            })
+        return rows
@@ -4,7 +4,7 @@ from .views import (
     ClientCreateView, ClientUpdateView,
     ClientDeleteView, AttemptView, AttemptDetailView, MessageListView, MessageDetailView, MessageCreateView,
     MessageUpdateView, MessageDeleteView, MailingListView, MailingCreateView, MailingDetailView, MailingUpdateView,
-    MailingDeleteView, MailingSendNowView
+    MailingDeleteView, MailingSendNowView, MailingProgressView
 )
 from .views.stats import StatsView
 
@@ -29,5 +29,6 @@ urlpatterns = [
     path('<int:pk>/edit/', MailingUpdateView.as_view(), name='mailing_update'),
     path('<int:pk>/delete/', MailingDeleteView.as_view(), name='mailing_delete'),
     path('<int:pk>/send/', MailingSendNowView.as_view(), name='mailing_send'),
+    path('<int:pk>/progress/', MailingProgressView.as_view(), name='mailing_progress'),
     path('stats/', StatsView.as_view(), name='stats'),
 ]
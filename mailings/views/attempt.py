@@ -1,17 +1,20 @@
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import ListView, DetailView
 from ..models import Attempt
+from ..pagination import KeysetPaginationMixin
 
 
-class AttemptView(LoginRequiredMixin, ListView):
+class AttemptView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     """Список попыток отправки сообщений.
 
     Отображает все попытки рассылок с возможностью фильтрации
-    по пользователю, рассылке и статусу.
+    по пользователю, рассылке и статусу. Листается по ключу
+    `(-date, id)` (индекс `attempt_keyset_idx`).
     """
     model = Attempt
-    template_name = 'mailings/attempts_list.html'
+    template_name = 'mailings/attempt_list.html'
     context_object_name = 'attempts'
+    keyset = ('-date', 'id')
 
     def get_queryset(self):
         """Возвращает выборку попыток с фильтрацией.
@@ -22,9 +25,7 @@ class AttemptView(LoginRequiredMixin, ListView):
         - Дополнительно можно фильтровать по ID рассылки (pk)
           и по статусу (успешно/неуспешно).
         """
-        qs = (Attempt.objects
-              .select_related('mailing')
-              .order_by('-date'))
+        qs = Attempt.objects.all()
         if not self.request.user.has_perm('mailings.view_all_attempts'):
             qs = qs.filter(mailing__owner=self.request.user)
 
@@ -1,19 +1,21 @@
 from ..forms import ClientForm
 from ..models import Client
+from ..pagination import KeysetPaginationMixin
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.urls import reverse_lazy, reverse
 from django.contrib.auth.mixins import LoginRequiredMixin
 
 
-class ClientListView(LoginRequiredMixin, ListView):
+class ClientListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     """Список клиентов.
 
     Отображает клиентов текущего пользователя.
-    Менеджеры видят всех клиентов.
+    Менеджеры видят всех клиентов. Листается по ключу `(full_name, id)`.
     """
     model = Client
     template_name = 'mailings/client_list.html'
     context_object_name = 'clients'
+    keyset = ('full_name', 'id')
 
     def get_queryset(self):
         """Фильтрует список клиентов.
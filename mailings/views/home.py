@@ -1,5 +1,6 @@
 from django.views.generic import TemplateView
-from ..models import Mailing, Client
+from ..estimates import estimate_count, unique_emails
+from ..models import Mailing
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import cache_page, cache_control
 
@@ -12,7 +13,9 @@ class HomeView(TemplateView):
     - количество всех рассылок,
     - количество активных (запущенных) рассылок,
     - количество уникальных клиентов.
-    Кэшируется на 120 секунд.
+    Кэшируется на 120 секунд. На больших таблицах показываются оценки
+    (см. `mailings/estimates.py`), а число уникальных клиентов — из оценки
+    HyperLogLog в Redis, чтобы пересборка страницы оставалась дешёвой.
     """
     template_name = 'mailings/home.html'
 
@@ -20,8 +23,8 @@ class HomeView(TemplateView):
         """Добавляет статистику в контекст шаблона."""
         context = super().get_context_data(**kwargs)
 
-        context['total_mailings'] = Mailing.objects.count()
-        context['active_mailings'] = Mailing.objects.filter(status=Mailing.Status.RUNNING).count()
-        context['unique_clients'] = Client.objects.values('email').distinct().count()
+        context['total_mailings'] = estimate_count(Mailing.objects.all())
+        context['active_mailings'] = estimate_count(Mailing.objects.filter(status=Mailing.Status.RUNNING))
+        context['unique_clients'] = unique_emails()
 
         return context
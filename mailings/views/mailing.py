@@ -1,28 +1,36 @@
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import never_cache
 from django.urls import reverse_lazy, reverse
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView, View
 from django.shortcuts import get_object_or_404, redirect
 
-from ..models import Mailing
+from ..models import Mailing, SendJob
+from ..pagination import KeysetPaginationMixin
 from ..forms import MailingForm
-from ..services import send_mailing_now
+from ..progress import get_progress
+from ..services import enqueue_mailing
+from ..timing import RunTimings
 
 
-class MailingListView(LoginRequiredMixin, ListView):
+class MailingListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     """Список рассылок.
 
     Отображает все рассылки текущего пользователя.
     Если у пользователя есть право 'view_all_mailings' —
-    отображаются все рассылки в системе.
+    отображаются все рассылки в системе. Листается по ключу `(start_time, id)`.
     """
     model = Mailing
     template_name = "mailings/mailing_list.html"
     context_object_name = "mailings"
+    keyset = ("start_time", "id")
 
     def get_queryset(self):
         """Фильтрует рассылки по правам доступа."""
-        qs = super().get_queryset()
+        qs = super().get_queryset().select_related("message")
         if self.request.user.has_perm('mailings.view_all_mailings'):
             return qs
         return qs.filter(owner=self.request.user)
@@ -41,6 +49,18 @@ class MailingDetailView(LoginRequiredMixin, DetailView):
             return qs
         return qs.filter(owner=self.request.user)
 
+    def get_context_data(self, **kwargs):
+        """Добавляет в контекст последние задания на отправку и замеры запуска."""
+        ctx = super().get_context_data(**kwargs)
+        ctx["send_jobs"] = self.object.send_jobs.order_by("-created_at")[:5]
+        ctx["run_timings"] = RunTimings.from_dict(self.object.run_timings)
+        # Пока рассылка отправляется или ждёт в очереди, страница опрашивает прогресс.
+        ctx["poll_progress"] = self.object.status == Mailing.Status.RUNNING or any(
+            job.status in SendJob.ACTIVE_STATUSES for job in ctx["send_jobs"]
+        )
+        ctx["progress_poll_interval"] = settings.MAILING_PROGRESS_POLL_INTERVAL
+        return ctx
+
 
 class MailingCreateView(LoginRequiredMixin, CreateView):
     """Создание новой рассылки.
@@ -112,15 +132,33 @@ class MailingDeleteView(LoginRequiredMixin, DeleteView):
 class MailingSendNowView(LoginRequiredMixin, View):
     """Ручной запуск рассылки.
 
-    Отправляет все сообщения выбранной рассылки и выводит статистику
-    (количество успешных и неуспешных отправок).
+    Ставит рассылку в очередь на отправку и сразу возвращает пользователя
+    на страницу рассылки. Саму отправку выполняет воркер `run_send_worker`.
     """
     def post(self, request, pk):
-        """Запускает рассылку и добавляет сообщение об успехе в интерфейс."""
+        """Ставит задание в очередь и добавляет сообщение в интерфейс."""
         mailing = get_object_or_404(Mailing, pk=pk, owner=request.user)
-        stats = send_mailing_now(mailing)
-        messages.success(
-            request,
-            f"Отправлено: {stats['ok']} из {stats['total']}. Ошибок: {stats['failed']}."
-        )
+        job, created = enqueue_mailing(mailing)
+        if created:
+            messages.success(request, f"Рассылка поставлена в очередь (задание №{job.pk}).")
+        else:
+            messages.info(request, f"Рассылка уже в очереди (задание №{job.pk}).")
         return redirect("mailings:mailing_detail", pk=mailing.pk)
+
+
+@method_decorator(never_cache, name="dispatch")
+class MailingProgressView(LoginRequiredMixin, View):
+    """Прогресс текущего запуска рассылки в JSON.
+
+    Счётчики читаются из кэша (Redis) одним запросом, без обращения
+    к таблицам рассылок и попыток, поэтому страницу можно опрашивать
+    часто. Если запусков не было, возвращается `{"status": null}`.
+    """
+    def get(self, request, pk):
+        progress = get_progress(pk)
+        if progress is None:
+            return JsonResponse({"status": None})
+        owner = progress.pop("owner")
+        if owner != request.user.pk and not request.user.has_perm("mailings.view_all_mailings"):
+            return JsonResponse({"detail": "Рассылка не найдена."}, status=404)
+        return JsonResponse(progress)
@@ -1,11 +1,44 @@
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.utils import timezone
 from django.views.generic import TemplateView
-from django.db.models import Count, Q
-from ..models import Mailing, Client, Attempt
+from ..estimates import unique_emails
+from ..models import Mailing
+from ..rollups import SCALES, attempt_series, watermark
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import cache_page, cache_control
 from django.views.decorators.vary import vary_on_cookie
 
+# Размер графика попыток в пикселях.
+CHART_WIDTH = 720
+CHART_HEIGHT = 200
+
+
+def series_chart(series: list, scale: str) -> dict:
+    """Геометрия SVG-графика для ряда `attempt_series`.
+
+    Возвращает:
+        dict: width, height, max, точки ломаных succeeded/failed
+        (строки для атрибута `points`) и подписи оси времени.
+    """
+    peak = max([row["succeeded"] for row in series] + [row["failed"] for row in series] + [1])
+    step = CHART_WIDTH / max(len(series) - 1, 1)
+
+    def points(key):
+        return " ".join(
+            f"{i * step:.1f},{CHART_HEIGHT - row[key] / peak * CHART_HEIGHT:.1f}" for i, row in enumerate(series)
+        )
+
+    label = "%d.%m %H:00" if scale == "hour" else "%d.%m"
+    ticks = [0, len(series) // 2, len(series) - 1]
+    return {
+        "width": CHART_WIDTH,
+        "height": CHART_HEIGHT,
+        "max": peak,
+        "succeeded": points("succeeded"),
+        "failed": points("failed"),
+        "labels": [timezone.localtime(series[i]["bucket"]).strftime(label) for i in ticks],
+    }
+
 
 @method_decorator([vary_on_cookie, cache_control(private=True, max_age=60), cache_page(60)], name="dispatch")
 class StatsView(LoginRequiredMixin, TemplateView):
@@ -14,9 +47,13 @@ class StatsView(LoginRequiredMixin, TemplateView):
     Отображает:
     - общее количество рассылок,
     - количество активных рассылок,
-    - количество уникальных клиентов,
+    - количество уникальных клиентов (на больших списках — оценка
+      HyperLogLog, см. `mailings/sketches.py`),
     - детализированные данные по каждой рассылке:
-      число клиентов, успешных и неуспешных попыток.
+      число клиентов, успешных и неуспешных попыток
+      (денормализованные счётчики `Mailing`, см. `mailings/counters.py`),
+    - график попыток по часам или дням (`?scale=hour|day`) из сводок
+      `mailings/rollups.py`, без чтения таблицы попыток.
     Кэшируется на 60 секунд и учитывает cookies пользователя.
     """
     template_name = "mailings/stats.html"
@@ -30,21 +67,20 @@ class StatsView(LoginRequiredMixin, TemplateView):
         ctx["active_mailings"] = Mailing.objects.filter(
             owner=u, status=Mailing.Status.RUNNING
         ).count()
-        ctx["unique_clients"] = Client.objects.filter(owner=u).count()
+        ctx["unique_clients"] = unique_emails(owner=u)
 
+        # Счётчики денормализованы в Mailing: без JOIN с клиентами и попытками.
         ctx["mailings_with_stats"] = (
             Mailing.objects.filter(owner=u)
             .select_related("message")
-            .annotate(
-                clients_count=Count("clients", distinct=True),
-                success_count=Count(
-                    "attempts",
-                    filter=Q(attempts__status=Attempt.Status.SUCCEEDED),
-                ),
-                fail_count=Count(
-                    "attempts",
-                    filter=Q(attempts__status=Attempt.Status.FAILED),
-                ),
-            )
+            .only("id", "message__topic", "recipients_count", "succeeded_count", "failed_count")
         )
+
+        scale = self.request.GET.get("scale")
+        scale = scale if scale in SCALES else "day"
+        series = attempt_series(scale, owner=u)
+        ctx["scale"] = scale
+        ctx["series"] = series
+        ctx["chart"] = series_chart(series, scale)
+        ctx["rollup_watermark"] = watermark()
         return ctx